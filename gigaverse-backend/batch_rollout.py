@@ -0,0 +1,170 @@
+import numpy as np
+
+from mcts_api_v2 import MAX_ROUNDS
+
+# Moves are encoded as column indices, in the same order the game reports them
+MOVES = ("rock", "paper", "scissor")
+
+# OUTCOME[p, e]: 1 = player wins, -1 = enemy wins, 0 = tie
+OUTCOME = np.array([
+    [0, -1, 1],   # rock vs rock/paper/scissor
+    [1, 0, -1],   # paper
+    [-1, 1, 0],   # scissor
+], dtype=np.int8)
+
+# Index of the move that counters each move (rock -> paper, paper -> scissor, scissor -> rock)
+COUNTER = (1, 2, 0)
+
+# Each call pays a fixed NumPy overhead per round, so the kernel only beats scalar
+# simulate() from about this many rollouts per call (~170us per rollout at 8,
+# ~50us at 32, ~20us at 128 and ~5us at 2048, against ~45us scalar)
+MIN_BATCH = 64
+
+
+def _pick_random(mask, rng):
+    """Picks a uniformly random True column per row of a boolean (n, 3) mask."""
+    counts = mask.sum(axis=1)
+    k = (rng.random(mask.shape[0]) * counts).astype(np.int64)
+    return np.argmax(np.cumsum(mask, axis=1) > k[:, None], axis=1)
+
+
+def _pick_best(mask, values):
+    """Picks the first column with the highest value among the True columns of each row."""
+    scored = np.where(mask, values[None, :], -np.inf)
+    return np.argmax(scored, axis=1)
+
+
+def _apply_damage(health, shield, damage, rows):
+    """Damage hits shield first, the remainder goes to health (floored at 0)."""
+    absorbed = np.minimum(shield[rows], damage)
+    shield[rows] -= absorbed
+    health[rows] = np.maximum(health[rows] - (damage - absorbed), 0)
+
+
+def simulate_batch(state, num_simulations, rng=None):
+    """
+    Plays num_simulations independent rollouts of `state` at once and returns the
+    fraction the player wins.
+
+    Mirrors mcts_api_v2.simulate(): the player follows the smart policy 80% of the
+    time and a charge-aware random policy otherwise, the enemy plays a uniformly
+    random legal move, and charges follow the same decrement/recharge rules.
+    Below MIN_BATCH rollouts the scalar simulate() is cheaper.
+    """
+    if num_simulations <= 0:
+        return 0.0
+    if rng is None:
+        rng = np.random.default_rng()
+    n = num_simulations
+
+    p_dmg = np.array([state.player_move_stats[m]["damage"] for m in MOVES], dtype=np.int64)
+    p_shd = np.array([state.player_move_stats[m]["shield"] for m in MOVES], dtype=np.int64)
+    e_dmg = np.array([state.enemy_move_stats[m]["damage"] for m in MOVES], dtype=np.int64)
+    e_shd = np.array([state.enemy_move_stats[m]["shield"] for m in MOVES], dtype=np.int64)
+
+    # Strongest enemy attack - first move with the highest damage, like max() over the dict
+    strongest_damage = max(state.enemy_move_stats[m]["damage"] for m in state.enemy_move_stats)
+    strongest_move = next(m for m in state.enemy_move_stats
+                          if state.enemy_move_stats[m]["damage"] == strongest_damage)
+    counter = COUNTER[MOVES.index(strongest_move)]
+
+    p_max_hp, p_max_sh = state.player_max_health, state.player_max_shield
+    e_max_hp, e_max_sh = state.enemy_max_health, state.enemy_max_shield
+
+    p_hp = np.full(n, state.player_health, dtype=np.int64)
+    p_sh = np.full(n, state.player_shield, dtype=np.int64)
+    e_hp = np.full(n, state.enemy_health, dtype=np.int64)
+    e_sh = np.full(n, state.enemy_shield, dtype=np.int64)
+    p_ch = np.tile(np.array([state.player_charges[m] for m in MOVES], dtype=np.int64), (n, 1))
+    e_ch = np.tile(np.array([state.enemy_charges[m] for m in MOVES], dtype=np.int64), (n, 1))
+    rounds = np.full(n, state.round_number, dtype=np.int64)
+
+    done = (p_hp <= 0) | (e_hp <= 0) | (rounds >= MAX_ROUNDS)
+
+    while not done.all():
+        live = np.flatnonzero(~done)
+        pc, ec = p_ch[live], e_ch[live]
+        player_moves = pc > 0
+        enemy_moves = ec > 0
+
+        # Rollouts where either side has no legal move stop where they are
+        stuck = ~player_moves.any(axis=1) | ~enemy_moves.any(axis=1)
+        if stuck.any():
+            done[live[stuck]] = True
+            keep = ~stuck
+            live, pc, ec = live[keep], pc[keep], ec[keep]
+            player_moves, enemy_moves = player_moves[keep], enemy_moves[keep]
+            if live.size == 0:
+                break
+        m = live.size
+
+        high_charge = pc > 1
+        has_high = high_charge.any(axis=1)
+        safe = np.where(has_high[:, None], high_charge, player_moves)
+
+        # --- Smart policy (80%) ---
+        enemy_total = (e_sh[live] + e_hp[live])[:, None]
+        killing = safe & (p_dmg[None, :] > enemy_total) & (pc > 1)
+        has_killing = killing.any(axis=1)
+
+        enemy_ratio = e_hp[live] / e_max_hp
+        player_ratio = p_hp[live] / p_max_hp
+
+        best_damage = _pick_best(safe, p_dmg)
+        best_shield = _pick_best(safe, p_shd)
+        counter_safe = safe[:, counter]
+        random_safe = _pick_random(safe, rng)
+
+        if strongest_damage > 3:
+            danger_move = np.where(counter_safe, counter, best_shield)
+        else:
+            danger_move = best_shield
+        if strongest_damage < 5:
+            balanced_move = best_damage
+        else:
+            balanced_move = np.where(counter_safe, counter, random_safe)
+
+        smart = np.where(player_ratio < 0.3, danger_move, balanced_move)
+        smart = np.where(enemy_ratio < 0.3, best_damage, smart)
+        killing_choice = _pick_random(np.where(has_killing[:, None], killing, safe), rng)
+        smart = np.where(has_killing, killing_choice, smart)
+
+        # --- Random policy (20%) - still prefers moves with charge > 1 ---
+        random_move = _pick_random(safe, rng)
+
+        use_smart = rng.random(m) < 0.8
+        p_move = np.where(use_smart, smart, random_move)
+        e_move = _pick_random(enemy_moves, rng)
+
+        # --- Charges: chosen move -1, the others +1 (max 3) ---
+        rows = np.arange(m)
+        new_pc = np.minimum(pc + 1, 3)
+        new_pc[rows, p_move] = pc[rows, p_move] - 1
+        new_ec = np.minimum(ec + 1, 3)
+        new_ec[rows, e_move] = ec[rows, e_move] - 1
+        p_ch[live] = new_pc
+        e_ch[live] = new_ec
+
+        # --- Resolve the round ---
+        outcome = OUTCOME[p_move, e_move]
+        pd, ps_bonus = p_dmg[p_move], p_shd[p_move]
+        ed, es_bonus = e_dmg[e_move], e_shd[e_move]
+
+        player_scores = outcome >= 0   # player win or tie
+        enemy_scores = outcome <= 0    # enemy win or tie
+
+        idx = live[player_scores]
+        p_sh[idx] = np.minimum(p_sh[idx] + ps_bonus[player_scores], p_max_sh)
+        idx = live[enemy_scores]
+        e_sh[idx] = np.minimum(e_sh[idx] + es_bonus[enemy_scores], e_max_sh)
+
+        _apply_damage(e_hp, e_sh, pd[player_scores], live[player_scores])
+        _apply_damage(p_hp, p_sh, ed[enemy_scores], live[enemy_scores])
+
+        # Same as apply_round(): the round only advances while the game is still running
+        running = (p_hp[live] > 0) & (e_hp[live] > 0) & (rounds[live] < MAX_ROUNDS)
+        rounds[live[running]] += 1
+        done[live] = (p_hp[live] <= 0) | (e_hp[live] <= 0) | (rounds[live] >= MAX_ROUNDS)
+
+    wins = (e_hp <= 0) & (p_hp > 0)
+    return float(wins.mean())
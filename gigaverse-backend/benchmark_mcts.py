@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Benchmark runner for the combat MCTS engine.
+
+Builds combat states against every floor/room enemy in enemy_stats.json and
+underhaul_enemy_stats.json at several player HP, shield and charge setups, times
+get_best_action() at fixed iteration counts and fixed time budgets, and prints a
+JSON report (iterations/s, p50/p95/p99 latency, peak RSS, and with --profile the
+summed per-phase SearchProfile). Every state is searched with a fixed seed, so
+reports from different commits are comparable.
+
+    python benchmark_mcts.py --iterations 1000 5000 --budgets-ms 50 200 --output bench.json
+"""
+
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+from mcts_api_v2 import SearchProfile, get_best_action
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ENEMY_FILES = ("enemy_stats.json", "underhaul_enemy_stats.json")
+
+# Representative mid-run player build
+PLAYER_MAX_HEALTH = 20
+PLAYER_MAX_SHIELD = 10
+PLAYER_MOVE_STATS = {
+    "rock": {"damage": 6, "shield": 1},
+    "paper": {"damage": 3, "shield": 4},
+    "scissor": {"damage": 4, "shield": 2},
+}
+
+HEALTH_RATIOS = (1.0, 0.5, 0.25)
+SHIELD_RATIOS = (1.0, 0.0)
+CHARGE_SETUPS = {
+    "full": {"rock": 3, "paper": 3, "scissor": 3},
+    "mixed": {"rock": 1, "paper": 2, "scissor": 3},
+}
+
+
+def load_enemies():
+    """Returns [(label, enemy)] for every floor/room enemy in the stats files."""
+    enemies = []
+    for filename in ENEMY_FILES:
+        with open(os.path.join(BASE_DIR, filename), "r") as f:
+            data = json.load(f)["enemies"]
+        source = filename.replace("_enemy_stats.json", "").replace(".json", "")
+        for floor_key, rooms in data.items():
+            for room_key, enemy in rooms.items():
+                enemies.append((f"{source}/{floor_key}/{room_key}", enemy))
+    return enemies
+
+
+def build_cases(enemies):
+    """One api_data dict per enemy x player HP x shield x charge setup."""
+    cases = []
+    for label, enemy in enemies:
+        for health_ratio in HEALTH_RATIOS:
+            for shield_ratio in SHIELD_RATIOS:
+                for charge_name, charges in CHARGE_SETUPS.items():
+                    cases.append({
+                        "label": f"{label} hp={health_ratio} sh={shield_ratio} ch={charge_name}",
+                        "api_data": {
+                            "player_move_stats": PLAYER_MOVE_STATS,
+                            "enemy_move_stats": enemy["moves"],
+                            "initial_state": {
+                                "player_health": max(1, round(PLAYER_MAX_HEALTH * health_ratio)),
+                                "player_shield": round(PLAYER_MAX_SHIELD * shield_ratio),
+                                "enemy_health": enemy["health"],
+                                "enemy_shield": enemy["shield"],
+                                "player_max_health": PLAYER_MAX_HEALTH,
+                                "player_max_shield": PLAYER_MAX_SHIELD,
+                                "enemy_max_health": enemy["health"],
+                                "enemy_max_shield": enemy["shield"],
+                                "round_number": 1,
+                            },
+                            "player_charges": dict(charges),
+                            "enemy_charges": {"rock": 3, "paper": 3, "scissor": 3},
+                        },
+                    })
+    return cases
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_mode(cases, iterations, time_budget_ms, seed, workers, rollout_batch, profile=False):
+    """Searches every case once and returns the timing summary for this mode."""
+    latencies = []
+    total_iterations = 0
+    moves = {}
+    mode_profile = SearchProfile() if profile else None
+    for i, case in enumerate(cases):
+        search_info = {}
+        started = time.perf_counter()
+        move = get_best_action(case["api_data"], iterations=iterations, time_budget_ms=time_budget_ms,
+                               workers=workers, rollout_batch=rollout_batch, search_info=search_info,
+                               verbose=False, seed=seed + i, profile=profile, use_book=False)
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        total_iterations += search_info.get("iterations", 0)
+        moves[case["label"]] = move
+        if mode_profile is not None and "profile" in search_info:
+            mode_profile.merge(search_info["profile"])
+
+    total_seconds = sum(latencies) / 1000.0
+    summary = {
+        "iterations": iterations,
+        "time_budget_ms": time_budget_ms,
+        "cases": len(cases),
+        "total_iterations": total_iterations,
+        "iterations_per_second": total_iterations / total_seconds if total_seconds > 0 else 0.0,
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies),
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "moves": moves,
+    }
+    if mode_profile is not None:
+        summary["profile"] = dict(dataclasses.asdict(mode_profile),
+                                  avg_rollout_length=mode_profile.avg_rollout_length,
+                                  avg_depth=mode_profile.avg_depth)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark combat MCTS decision latency and throughput")
+    parser.add_argument("--iterations", type=int, nargs="*", default=[1000, 5000],
+                        help="fixed iteration counts to benchmark")
+    parser.add_argument("--budgets-ms", type=int, nargs="*", default=[50, 200],
+                        help="fixed time budgets (ms) to benchmark; iterations are capped at --budget-cap")
+    parser.add_argument("--budget-cap", type=int, default=1000000,
+                        help="iteration upper bound for time-budget runs")
+    parser.add_argument("--max-cases", type=int, default=0,
+                        help="evenly subsample the case list down to this many (0 = all)")
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--rollout-batch", type=int, default=0)
+    parser.add_argument("--profile", action="store_true",
+                        help="also collect per-phase MCTS timings (adds a little overhead to the latencies)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    cases = build_cases(load_enemies())
+    if args.max_cases and len(cases) > args.max_cases:
+        step = len(cases) / args.max_cases
+        cases = [cases[int(i * step)] for i in range(args.max_cases)]
+
+    modes = [(n, None) for n in args.iterations] + [(args.budget_cap, ms) for ms in args.budgets_ms]
+    results = []
+    for iterations, budget in modes:
+        name = f"{budget}ms" if budget is not None else f"{iterations} iterations"
+        print(f"Benchmarking {len(cases)} cases at {name}...", file=sys.stderr)
+        results.append(run_mode(cases, iterations, budget, args.seed, args.workers, args.rollout_batch,
+                                args.profile))
+        summary = results[-1]
+        print(f"  {summary['iterations_per_second']:.0f} it/s, p50 {summary['latency_ms']['p50']:.1f}ms, "
+              f"p95 {summary['latency_ms']['p95']:.1f}ms, p99 {summary['latency_ms']['p99']:.1f}ms",
+              file=sys.stderr)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "seed": args.seed,
+            "workers": args.workers,
+            "rollout_batch": args.rollout_batch,
+            "profile": args.profile,
+            "player_move_stats": PLAYER_MOVE_STATS,
+            "health_ratios": HEALTH_RATIOS,
+            "shield_ratios": SHIELD_RATIOS,
+            "charge_setups": CHARGE_SETUPS,
+        },
+        "modes": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
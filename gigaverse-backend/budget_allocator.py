@@ -0,0 +1,117 @@
+"""
+Adaptive MCTS iteration budgets for the rounds of a dungeon run.
+
+A fixed iteration count spends as much on a forced move or an obvious killing
+blow as on a coin-flip round. BudgetAllocator classifies each combat state,
+scales the base budget up for close decisions and down for trivial ones, takes
+the previous round's search into account and keeps the whole run under an
+optional total cap.
+"""
+
+import math
+
+from mcts_api_v2 import get_player_possible_moves
+
+# Budget multiplier per state class
+CLASS_SCALES = {
+    "forced": 0.0,        # one legal move: minimum budget
+    "killing": 0.1,       # a charged move kills this round
+    "comfortable": 0.2,   # we win the damage race by DECISIVE_ROUNDS or more
+    "desperate": 0.3,     # we lose the damage race by DECISIVE_ROUNDS or more
+    "close": 1.25,        # both sides need about the same number of rounds
+    "normal": 0.75,
+}
+DECISIVE_ROUNDS = 3
+
+# Previous round's win-rate gap between the best and second-best move
+DECISIVE_GAP = 0.2      # clear decision last round: scale by DECISIVE_FACTOR
+DECISIVE_FACTOR = 0.6
+CLOSE_GAP = 0.03        # near tie last round: scale by CLOSE_FACTOR
+CLOSE_FACTOR = 1.5
+
+
+def rounds_to_kill(health, shield, damage):
+    """Rounds needed to burn through shield + health at `damage` per round."""
+    return math.ceil((health + shield) / damage) if damage > 0 else math.inf
+
+
+class BudgetAllocator:
+    """
+    allocate(state) returns the iteration budget for the next decision and
+    record() feeds back what the search used and how decisive it was.
+    run_budget caps the iterations of a whole run (None = no cap); once it is
+    spent every decision gets min_iterations.
+    """
+    def __init__(self, base_iterations=50000, min_iterations=500, max_iterations=150000, run_budget=None):
+        self.base_iterations = base_iterations
+        self.min_iterations = min_iterations
+        self.max_iterations = max_iterations
+        self.run_budget = run_budget
+        self.reset_run()
+
+    def reset_run(self):
+        self.spent = 0
+        self.decisions = 0
+        self.class_counts = {}
+        self.end_fight()
+
+    def end_fight(self):
+        """Forgets the previous round's decisiveness (a new enemy starts a new search)."""
+        self.previous_gap = None
+
+    def classify(self, state):
+        """Returns the state class (see CLASS_SCALES)."""
+        moves = get_player_possible_moves(state)
+        if len(moves) <= 1:
+            return "forced"
+
+        player_damage = state.context.player_damage
+        enemy_total = state.enemy_health + state.enemy_shield
+        if any(player_damage[m] > enemy_total and state.player_charges[m] > 1 for m in moves):
+            return "killing"
+
+        player_rounds = rounds_to_kill(state.enemy_health, state.enemy_shield,
+                                       max(player_damage[m] for m in moves))
+        enemy_rounds = rounds_to_kill(state.player_health, state.player_shield, state.context.strongest_damage)
+        margin = enemy_rounds - player_rounds
+        if margin >= DECISIVE_ROUNDS:
+            return "comfortable"
+        if margin <= -DECISIVE_ROUNDS:
+            return "desperate"
+        if abs(margin) <= 1:
+            return "close"
+        return "normal"
+
+    def allocate(self, state):
+        """Iteration budget for a search from `state`."""
+        state_class = self.classify(state)
+        self.class_counts[state_class] = self.class_counts.get(state_class, 0) + 1
+
+        scale = CLASS_SCALES[state_class]
+        if state_class not in ("forced", "killing") and self.previous_gap is not None:
+            if self.previous_gap >= DECISIVE_GAP:
+                scale *= DECISIVE_FACTOR
+            elif self.previous_gap <= CLOSE_GAP:
+                scale *= CLOSE_FACTOR
+
+        iterations = int(self.base_iterations * scale)
+        iterations = max(self.min_iterations, min(self.max_iterations, iterations))
+        if self.run_budget is not None:
+            iterations = max(self.min_iterations, min(iterations, self.run_budget - self.spent))
+        return iterations
+
+    def record(self, iterations_used, win_rates=None):
+        """Books the iterations a search ran and remembers the gap between its two best moves."""
+        self.spent += iterations_used
+        self.decisions += 1
+        rates = sorted(win_rates.values(), reverse=True) if win_rates else []
+        self.previous_gap = rates[0] - rates[1] if len(rates) >= 2 else None
+
+    def summary(self):
+        return {
+            "decisions": self.decisions,
+            "iterations": self.spent,
+            "average": self.spent / self.decisions if self.decisions else 0,
+            "run_budget": self.run_budget,
+            "classes": dict(self.class_counts),
+        }
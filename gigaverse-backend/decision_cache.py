@@ -0,0 +1,186 @@
+"""
+Persistent decision cache for combat MCTS.
+
+The same (move stats, HP, shield, charges) positions come up again and again
+across runs, so finished searches are remembered in two tiers: an in-process
+LRU and an SQLite file that every worker process and service instance can
+share. An entry records the chosen move, the root win rates and the iteration
+budget it was searched with; a lookup only hits when that budget is at least
+the one being asked for. Searches with non-default engine settings (exact
+engine, batched rollouts, early stop, transposition table) are kept apart from
+plain ones.
+
+The SQLite file lives outside the source tree (GIGAVERSE_DECISION_CACHE
+overrides the location).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from mcts_api_v2 import MoveScore, SearchResult, state_signature
+
+DEFAULT_CACHE_PATH = os.environ.get("GIGAVERSE_DECISION_CACHE",
+                                    os.path.join(os.path.expanduser("~"), ".cache", "gigaverse",
+                                                 "decision_cache.sqlite"))
+
+# Stop reasons whose result answers the full requested budget; anything else
+# (deadline, capacity) is stored with the iterations it actually completed
+SETTLED_STOP_REASONS = ("iterations", "single_move", "unreachable", "confident", "solved")
+
+
+class DecisionCache:
+    """
+    Two-tier cache of search decisions keyed by state_signature(). path=None
+    keeps it in memory only. Safe to share between threads; separate processes
+    share the SQLite file (WAL mode).
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_memory_entries=20000):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.memory = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _db(self):
+        """Connection for this process (reopened after a fork), or None without a path."""
+        if self.path is None:
+            return None
+        if self._conn is None or self._pid != os.getpid():
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS decisions (
+                    key TEXT PRIMARY KEY,
+                    move TEXT NOT NULL,
+                    win_rates TEXT NOT NULL,
+                    iterations INTEGER NOT NULL,
+                    updated REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    @staticmethod
+    def key(state, engine="mcts", rollout_batch=0, early_stop=False, tt_max_entries=0):
+        """state_signature() plus the search settings that change the result, when not the defaults."""
+        settings = []
+        if engine != "mcts":
+            settings.append(f"engine={engine}")
+        if rollout_batch:
+            settings.append(f"rollout_batch={rollout_batch}")
+        if early_stop:
+            settings.append("early_stop")
+        if tt_max_entries:
+            settings.append(f"tt={tt_max_entries}")
+        signature = state_signature(state)
+        return signature + "|" + ",".join(settings) if settings else signature
+
+    def get(self, state, iterations, **settings):
+        """
+        SearchResult for `state` if a decision searched with at least `iterations`
+        and the same settings (see key) is cached, otherwise None.
+        """
+        key = self.key(state, **settings)
+        with self._lock:
+            entry = self.memory.get(key)
+            if entry is not None and entry[2] >= iterations:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._to_result(state, entry)
+
+            db = self._db()
+            if db is not None:
+                row = db.execute("SELECT move, win_rates, iterations FROM decisions WHERE key = ?",
+                                 (key,)).fetchone()
+                if row is not None and row[2] >= iterations:
+                    entry = (row[0], json.loads(row[1]), row[2])
+                    self._remember(key, entry)
+                    self.disk_hits += 1
+                    return self._to_result(state, entry)
+            self.misses += 1
+            return None
+
+    def put(self, state, result, iterations, **settings):
+        """
+        Stores a finished search of `state` that was asked for `iterations`.
+        Searches cut short by a deadline or a full arena are stored with the
+        iterations they completed; book and cache hits are not stored again. An
+        entry is only replaced by one with a larger budget.
+        """
+        if result.engine in ("book", "cache") or not result.moves:
+            return
+        budget = iterations if result.stop_reason in SETTLED_STOP_REASONS else result.iterations
+        if budget <= 0:
+            return
+        key = self.key(state, **settings)
+        entry = (result.move, result.win_rates, budget)
+        with self._lock:
+            cached = self.memory.get(key)
+            if cached is None or cached[2] < budget:
+                self._remember(key, entry)
+            db = self._db()
+            if db is not None:
+                db.execute("""
+                    INSERT INTO decisions (key, move, win_rates, iterations, updated) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET move = excluded.move, win_rates = excluded.win_rates,
+                        iterations = excluded.iterations, updated = excluded.updated
+                    WHERE excluded.iterations > decisions.iterations
+                """, (key, result.move, json.dumps(result.win_rates), budget, time.time()))
+                db.commit()
+            self.stores += 1
+
+    @staticmethod
+    def _to_result(state, entry):
+        move, win_rates, iterations = entry
+        moves = [MoveScore(move=m, visits=0, wins=0.0, win_rate=win_rate, charge=state.player_charges[m],
+                           final_score=win_rate)
+                 for m, win_rate in win_rates.items()]
+        return SearchResult(move=move, moves=moves, iterations=iterations, stop_reason="cached", engine="cache",
+                            selection="cache")
+
+    def disk_entries(self):
+        db = self._db()
+        if db is None:
+            return 0
+        with self._lock:
+            return db.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+
+    def stats(self):
+        """Hit/miss counters and sizes of both tiers."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "lookups": lookups,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "memory_entries": len(self.memory),
+            "disk_entries": self.disk_entries(),
+            "path": self.path,
+        }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
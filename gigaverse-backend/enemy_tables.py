@@ -0,0 +1,102 @@
+"""
+Enemy tables for every dungeon mode, loaded once per process.
+
+The enemy stats files are parsed on first use (relative to this module, not the
+working directory) into an EnemyTable per mode: the enemies in dungeon order
+plus the future-enemy list and distance weights for every (floor, room) a loot
+choice can happen at. The tables are shared by the whole process, so they are
+built from tuples only; Enemy.move_stats_dict() hands out a fresh copy of the
+move stats in the dict form GameState expects.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ENEMY_FILES = {
+    "normal": "enemy_stats.json",
+    "underhaul": "underhaul_enemy_stats.json",
+}
+ROOMS_PER_FLOOR = 4
+MOVES = ("rock", "paper", "scissor")
+
+
+def distance_weight(floor, room, current_floor, current_room):
+    """Closer enemies matter more: 4.0 for the next room, 0.5 less per room further, at least 0.5."""
+    distance = ((floor - current_floor) * ROOMS_PER_FLOOR) + (room - current_room)
+    return max(0.5, 4.0 - (distance * 0.5))
+
+
+@dataclass(frozen=True)
+class Enemy:
+    floor: int
+    room: int
+    health: int
+    shield: int
+    move_stats: Tuple[Tuple[int, int], ...]  # (damage, shield) per MOVES entry
+
+    def move_stats_dict(self):
+        """A new {"rock": {"damage", "shield"}, ...} dict as GameState expects."""
+        return {move: {"damage": damage, "shield": shield} for move, (damage, shield) in zip(MOVES, self.move_stats)}
+
+
+@dataclass(frozen=True)
+class FutureEnemy:
+    enemy: Enemy
+    weight: float
+
+
+class EnemyTable:
+    """
+    One dungeon mode's enemies. future(floor, room) returns the (enemy, weight)
+    pairs for every room after (floor, room), precomputed for each position in
+    the dungeon and for the start of each floor (room 0).
+    """
+    def __init__(self, mode, enemies):
+        self.mode = mode
+        self.enemies = tuple(sorted(enemies, key=lambda e: (e.floor, e.room)))
+        self._by_position = {(e.floor, e.room): e for e in self.enemies}
+        positions = set(self._by_position) | {(e.floor, 0) for e in self.enemies}
+        self._future = {position: self._compute_future(*position) for position in positions}
+
+    def __len__(self):
+        return len(self.enemies)
+
+    def enemy(self, floor, room):
+        """The enemy at (floor, room), or None."""
+        return self._by_position.get((int(floor), int(room)))
+
+    def _compute_future(self, current_floor, current_room):
+        return tuple(FutureEnemy(e, distance_weight(e.floor, e.room, current_floor, current_room))
+                     for e in self.enemies
+                     if e.floor > current_floor or (e.floor == current_floor and e.room > current_room))
+
+    def future(self, current_floor, current_room) -> Tuple[FutureEnemy, ...]:
+        """Enemies in later rooms/floors with their distance weights, in dungeon order."""
+        position = (int(current_floor), int(current_room))
+        future = self._future.get(position)
+        return future if future is not None else self._compute_future(*position)
+
+    @classmethod
+    def load(cls, mode, path):
+        with open(path, "r") as f:
+            floors = json.load(f)["enemies"]
+        enemies = []
+        for floor_key, rooms in floors.items():
+            for room_key, stats in rooms.items():
+                move_stats = tuple((stats["moves"][move]["damage"], stats["moves"][move]["shield"])
+                                   for move in MOVES)
+                enemies.append(Enemy(int(floor_key.split("_")[1]), int(room_key.split("_")[1]),
+                                     stats["health"], stats["shield"], move_stats))
+        return cls(mode, enemies)
+
+
+@lru_cache(maxsize=None)
+def get_enemy_table(mode="underhaul"):
+    """The EnemyTable for `mode` (see ENEMY_FILES), parsed on first use and shared afterwards."""
+    if mode not in ENEMY_FILES:
+        raise ValueError(f"Unknown dungeon mode: {mode}")
+    return EnemyTable.load(mode, os.path.join(BASE_DIR, ENEMY_FILES[mode]))
@@ -0,0 +1,137 @@
+from mcts_api_v2 import MAX_ROUNDS
+
+MOVES = ("rock", "paper", "scissor")
+
+# Default cap on memoized states before giving up and letting the caller fall back to MCTS.
+# Each state costs ~10us to solve, so a fight that overflows wastes ~50ms before the
+# fallback. Most early-floor fights at full HP need far more states than any cap that
+# keeps that cheap, so the exact engine mostly pays off on short or nearly decided fights.
+EXACT_MAX_STATES = 5000
+
+
+class ExactTableOverflow(Exception):
+    """Raised when the memo table would grow past the configured size."""
+    pass
+
+
+def _outcome(p, e):
+    """1 = player wins, -1 = enemy wins, 0 = tie (moves encoded as indices into MOVES)."""
+    if p == e:
+        return 0
+    return 1 if (p - e) % 3 == 1 else -1
+
+
+def solve_exact(state, max_states=EXACT_MAX_STATES):
+    """
+    Computes the exact win probability of every legal player move from `state`,
+    assuming the player plays optimally afterwards and the enemy picks a uniformly
+    random legal move each round (the same enemy model the rollouts use).
+
+    Returns (best_move, {move: win_probability}). Raises ExactTableOverflow if more
+    than max_states distinct states would have to be memoized.
+    """
+    p_dmg = [state.player_move_stats[m]["damage"] for m in MOVES]
+    p_shd = [state.player_move_stats[m]["shield"] for m in MOVES]
+    e_dmg = [state.enemy_move_stats[m]["damage"] for m in MOVES]
+    e_shd = [state.enemy_move_stats[m]["shield"] for m in MOVES]
+    p_max_sh = state.player_max_shield
+    e_max_sh = state.enemy_max_shield
+    # Per (player move, enemy move): does each side gain shield / deal damage this round
+    player_scores = [[_outcome(p, e) >= 0 for e in range(3)] for p in range(3)]
+    enemy_scores = [[_outcome(p, e) <= 0 for e in range(3)] for p in range(3)]
+    # Try the hardest-hitting moves first so pruning kicks in early
+    move_order = sorted(range(3), key=lambda p: -p_dmg[p])
+    max_hit = max(p_dmg)
+
+    memo = {}
+    recharged = {}
+
+    def recharge(charges, chosen):
+        key = (charges, chosen)
+        result = recharged.get(key)
+        if result is None:
+            result = tuple(c - 1 if i == chosen else min(c + 1, 3) for i, c in enumerate(charges))
+            recharged[key] = result
+        return result
+
+    def move_values(ph, ps, eh, es, pc, ec, rnd, prune=False):
+        """
+        Expected value of each legal player move against a uniform enemy. With prune
+        set, moves that provably cannot beat the best one found so far are cut short:
+        their entry is a partial sum (a lower value, not an estimate) and moves after
+        a certain win are left out. Only the maximum is exact then.
+        """
+        enemy_moves = [e for e in range(3) if ec[e] > 0]
+        enemy_next = [recharge(ec, e) for e in enemy_moves]
+        count = len(enemy_moves)
+        values = {}
+        best = 0.0
+        for p in move_order:
+            if pc[p] <= 0:
+                continue
+            next_pc = recharge(pc, p)
+            pd = p_dmg[p]
+            total = 0.0
+            for j in range(count):
+                e = enemy_moves[j]
+                # Resolve the round exactly like apply_round()
+                nph, nps, neh, nes = ph, ps, eh, es
+                if player_scores[p][e]:
+                    nps = min(nps + p_shd[p], p_max_sh)
+                if enemy_scores[p][e]:
+                    nes = min(nes + e_shd[e], e_max_sh)
+                if player_scores[p][e]:
+                    if nes >= pd:
+                        nes -= pd
+                    else:
+                        neh = max(neh - (pd - nes), 0)
+                        nes = 0
+                if enemy_scores[p][e]:
+                    ed = e_dmg[e]
+                    if nps >= ed:
+                        nps -= ed
+                    else:
+                        nph = max(nph - (ed - nps), 0)
+                        nps = 0
+
+                if neh <= 0:
+                    total += 1.0 if nph > 0 else 0.0
+                elif nph > 0 and rnd + 1 < MAX_ROUNDS and max_hit * (MAX_ROUNDS - rnd - 1) >= neh + nes:
+                    total += value(nph, nps, neh, nes, next_pc, enemy_next[j], rnd + 1)
+                # Remaining outcomes can add at most 1 each
+                if prune and total + (count - j - 1) <= best * count:
+                    break
+            values[p] = total / count
+            if values[p] > best:
+                best = values[p]
+                if prune and best >= 1.0:
+                    break
+        return values
+
+    def value(ph, ps, eh, es, pc, ec, rnd):
+        """Win probability of a live state at the start of round rnd."""
+        key = (ph, ps, eh, es, pc, ec, rnd)
+        result = memo.get(key)
+        if result is not None:
+            return result
+        if len(memo) >= max_states:
+            raise ExactTableOverflow(f"exact solver exceeded {max_states} states")
+        if ec[0] <= 0 and ec[1] <= 0 and ec[2] <= 0:
+            result = 0.0
+        elif pc[0] <= 0 and pc[1] <= 0 and pc[2] <= 0:
+            result = 0.0
+        else:
+            result = max(move_values(ph, ps, eh, es, pc, ec, rnd, prune=True).values())
+        memo[key] = result
+        return result
+
+    pc = tuple(state.player_charges[m] for m in MOVES)
+    ec = tuple(state.enemy_charges[m] for m in MOVES)
+    if state.is_terminal() or not any(c > 0 for c in pc) or not any(c > 0 for c in ec):
+        return None, {}
+
+    values = move_values(state.player_health, state.player_shield, state.enemy_health,
+                         state.enemy_shield, pc, ec, state.round_number)
+    win_rates = {MOVES[p]: values[p] for p in range(3) if p in values}
+    best_move = max(win_rates, key=win_rates.get)
+    return best_move, win_rates
@@ -144,8 +144,8 @@ class FishingMCTSState:
             fish_damage_dealt = self.game_state.fish_max_hp - self.game_state.fish_hp
             return fish_damage_dealt / self.game_state.fish_max_hp
     
-    def take_action(self, action: FishingGameAction):
-        """Apply action and return new state"""
+    def take_action(self, action: FishingGameAction, rng=random):
+        """Apply action and return new state (fish movement is drawn from rng)"""
         new_state = copy.deepcopy(self)
         
         # Find the card being played
@@ -176,7 +176,7 @@ class FishingMCTSState:
         
         # Simulate fish movement for next turn
         if new_state.game_state.fish_hp > 0:
-            new_fish_pos = random.choice(new_state.game_state.possible_fish_positions)
+            new_fish_pos = rng.choice(new_state.game_state.possible_fish_positions)
             new_state.game_state.fish_prev_pos = new_state.game_state.fish_pos
             new_state.game_state.fish_pos = new_fish_pos
             new_state.game_state.pattern = detect_fish_pattern(new_fish_pos, new_state.game_state.fish_prev_pos)
@@ -185,8 +185,11 @@ class FishingMCTSState:
         new_state.game_state.turn += 1
         return new_state
 
-def simple_mcts_search(initial_state: FishingMCTSState, simulations: int = 100) -> Optional[FishingGameAction]:
-    """Simple MCTS search implementation"""
+def simple_mcts_search(initial_state: FishingMCTSState, simulations: int = 100,
+                       rng: Optional[random.Random] = None) -> Optional[FishingGameAction]:
+    """Simple MCTS search implementation (pass a seeded random.Random for reproducible results)"""
+    if rng is None:
+        rng = random
     legal_actions = initial_state.get_legal_actions()
     if not legal_actions:
         return None
@@ -199,7 +202,7 @@ def simple_mcts_search(initial_state: FishingMCTSState, simulations: int = 100)
         
         for _ in range(simulations // len(legal_actions)):
             # Take the action
-            new_state = initial_state.take_action(action)
+            new_state = initial_state.take_action(action, rng)
             
             # Run a random simulation for a few steps
             current_state = new_state
@@ -212,8 +215,8 @@ def simple_mcts_search(initial_state: FishingMCTSState, simulations: int = 100)
                     break
                     
                 # Pick a random action
-                random_action = random.choice(available_actions)
-                current_state = current_state.take_action(random_action)
+                random_action = rng.choice(available_actions)
+                current_state = current_state.take_action(random_action, rng)
             
             # Get the reward
             reward = current_state.get_reward()
@@ -232,8 +235,9 @@ def simple_mcts_search(initial_state: FishingMCTSState, simulations: int = 100)
 def get_fishing_mcts_recommendation(cards: List[Dict], fish_position: List[int], 
                                   fish_previous_position: List[int], 
                                   fish_hp: int, fish_max_hp: int,
-                                  player_hp: int, player_max_hp: int) -> int:
-    """Get MCTS recommendation for fishing card selection"""
+                                  player_hp: int, player_max_hp: int,
+                                  seed: Optional[int] = None) -> int:
+    """Get MCTS recommendation for fishing card selection (same seed, same recommendation)"""
     try:
         # Convert position coordinates to grid positions
         current_fish_pos = convert_coord_to_position(fish_position)
@@ -263,7 +267,8 @@ def get_fishing_mcts_recommendation(cards: List[Dict], fish_position: List[int],
         mcts_state = FishingMCTSState(game_state)
         
         # Run simple MCTS search
-        best_action = simple_mcts_search(mcts_state, simulations=100)
+        rng = random.Random(seed) if seed is not None else None
+        best_action = simple_mcts_search(mcts_state, simulations=100, rng=rng)
         
         if best_action:
             return best_action.card_id
@@ -97,12 +97,15 @@ class GameEventEmitter:
             "stats": move_stats
         }, "player")
     
-    async def emit_move_calculation(self, message: str = "Calculating best move..."):
-        """Emit move calculation status"""
-        await self.emit_event("move_calculation", {
+    async def emit_move_calculation(self, message: str = "Calculating best move...", progress: Optional[Dict[str, Any]] = None):
+        """Emit move calculation status, optionally with a search progress snapshot (SearchResult.summary())"""
+        data = {
             "message": message,
             "status": "calculating"
-        }, "combat")
+        }
+        if progress is not None:
+            data["progress"] = progress
+        await self.emit_event("move_calculation", data, "combat")
     
     async def emit_move_selected(self, move: str, symbol: str):
         """Emit selected move"""
@@ -1,7 +1,9 @@
 import time
 import sys
 from termcolor import colored
-from mcts_api_v2 import get_best_action, determine_outcome
+from mcts_api_v2 import (get_best_action, determine_outcome, build_state, SearchSession, ProgressHook,
+                         accept_stable_leader)
+from budget_allocator import BudgetAllocator
 
 class GameManager:
     def __init__(self, *args, **kwargs):
@@ -44,10 +46,31 @@ class GameManager:
         self.current_floor = 1
         self.current_room = 1
         
+        # Search tree carried between rounds of the current fight
+        self.search_session = None
+        self.last_round_moves = None
+        
+        # Decisions remembered across fights and runs (created on first use)
+        self.decision_cache = None
+        
+        # Per-run MCTS budget bookkeeping (created per run from the settings)
+        self.budget_allocator = None
+        
         # Settings
         self.settings = {
             'mcts_iterations': 50000,
-            'sim_iterations': 100
+            'mcts_time_budget_ms': None,  # set to cap decision latency; mcts_iterations stays the upper bound
+            'mcts_early_stop': True,  # stop searching once the leading move can no longer be overtaken
+            'sim_iterations': 100,
+            'loot_workers': 1,  # >1 simulates the loot option x enemy grid on that many processes (small grids gain little)
+            'loot_racing': False,  # race loot options in growing rounds, dropping clearly worse ones early
+            'reuse_search_tree': True,
+            'use_opening_book': True,  # answer precomputed opening positions without searching
+            'use_decision_cache': True,  # reuse earlier decisions for identical states (before any tree search)
+            'mcts_progress_ms': 250,  # stream search snapshots to the dashboard this often (None = off)
+            'mcts_accept_stable_snapshots': 0,  # >0: stop once the leader held this many snapshots in a row
+            'adaptive_iterations': True,  # scale mcts_iterations per state (trivial rounds get less, close ones more)
+            'mcts_run_budget': None  # cap on the total MCTS iterations of one run (None = no cap)
         }
     
     def set_event_emitter(self, event_emitter):
@@ -76,6 +99,43 @@ class GameManager:
             except Exception as e:
                 print(f"Sync event emission error: {e}")
     
+    def make_progress_hook(self):
+        """
+        ProgressHook that streams search snapshots to the web UI and, if
+        configured, accepts the answer once the leader has stabilized.
+        Returns None when there is nothing to report to and nothing to accept.
+        """
+        has_emitter = hasattr(self, 'sync_emitter') and self.sync_emitter
+        stable_snapshots = self.settings.get('mcts_accept_stable_snapshots') or 0
+        every_ms = self.settings.get('mcts_progress_ms')
+        if not every_ms or (not has_emitter and not stable_snapshots):
+            return None
+        
+        def report(snapshot):
+            rates = ", ".join(f"{score.move} {score.win_rate:.0%}" for score in snapshot.moves)
+            self.emit_sync_event('emit_move_calculation',
+                                 f"Searching... {snapshot.iterations} iterations, leading: {snapshot.move} ({rates})",
+                                 progress=snapshot.summary())
+        
+        callback = accept_stable_leader(stable_snapshots, forward=report) if stable_snapshots else report
+        return ProgressHook(callback, every_iterations=0, every_ms=every_ms)
+    
+    def allocate_iterations(self, api_data):
+        """Iteration budget for this decision: adaptive (see BudgetAllocator) or the fixed setting."""
+        if not self.settings.get('adaptive_iterations'):
+            return self.settings['mcts_iterations']
+        if self.budget_allocator is None:
+            self.budget_allocator = BudgetAllocator(self.settings['mcts_iterations'],
+                                                    run_budget=self.settings.get('mcts_run_budget'))
+        return self.budget_allocator.allocate(build_state(api_data))
+    
+    def end_fight(self):
+        """The next fight starts a fresh search tree and budget history."""
+        self.search_session = None
+        self.last_round_moves = None
+        if self.budget_allocator is not None:
+            self.budget_allocator.end_fight()
+    
     def reset_game_stats(self):
         """Reset game statistics for a new run"""
         self.current_enemy_count = 0
@@ -83,6 +143,9 @@ class GameManager:
         self.loot_history = []
         self.current_floor = 1
         self.current_room = 1
+        self.search_session = None
+        self.last_round_moves = None
+        self.budget_allocator = None
     
     def update_settings(self, new_settings):
         """Update game settings"""
@@ -224,6 +287,10 @@ class GameManager:
         
         self.reset_game_stats()
         
+        # Loot is scored against this mode's future enemies
+        if hasattr(self.loot_manager, 'set_mode'):
+            self.loot_manager.set_mode(mode)
+        
         # If this is part of a multi-run, action_token and initial_run will be provided
         dungeon_id = 0  # For actions after start
         
@@ -308,7 +375,9 @@ class GameManager:
                 best_loot = self.loot_manager.select_best_loot_option(
                     loot_options, state_data, player_stats, enemy_stats, 
                     player_charges, enemy_charges, sim_iterations=self.settings['sim_iterations'],
-                    current_floor=self.current_floor, current_room=self.current_room
+                    current_floor=self.current_floor, current_room=self.current_room,
+                    workers=self.settings.get('loot_workers', 1),
+                    racing=self.settings.get('loot_racing', False)
                 )
                 
                 # Display selected loot
@@ -340,6 +409,9 @@ class GameManager:
                 
                 run = loot_response["data"]["run"]
                 
+                # The next fight starts a fresh search tree
+                self.end_fight()
+                
                 # Prepare for next room
                 self.current_room += 1
                 if self.current_room > self.ENEMIES_PER_FLOOR:
@@ -418,8 +490,37 @@ class GameManager:
                 self.emit_sync_event('emit_move_calculation', "Calculating best move...")
                 if not hasattr(self, 'sync_emitter') or not self.sync_emitter:
                     print(colored("\nCalculating best move...", 'green'))
-                    
-                best_move = get_best_action(api_data, iterations=self.settings['mcts_iterations'])
+                
+                iterations = self.allocate_iterations(api_data)
+                search_info = {}
+                if self.settings.get('use_decision_cache') and self.decision_cache is None:
+                    from decision_cache import DecisionCache
+                    self.decision_cache = DecisionCache()
+                cache = self.decision_cache if self.settings.get('use_decision_cache') else None
+                if self.settings.get('reuse_search_tree'):
+                    # Continue from last round's tree when the observed outcome matches it
+                    if self.search_session is not None and self.last_round_moves:
+                        self.search_session.advance(*self.last_round_moves, api_data)
+                    else:
+                        self.search_session = SearchSession(api_data,
+                                                            use_book=self.settings.get('use_opening_book', False),
+                                                            cache=cache)
+                    best_move, win_rates = self.search_session.best_move(
+                        iterations, return_win_rates=True,
+                        time_budget_ms=self.settings.get('mcts_time_budget_ms'),
+                        search_info=search_info,
+                        early_stop=self.settings.get('mcts_early_stop', False),
+                        progress=self.make_progress_hook())
+                else:
+                    best_move, win_rates = get_best_action(api_data, iterations=iterations, return_win_rates=True,
+                                                time_budget_ms=self.settings.get('mcts_time_budget_ms'),
+                                                search_info=search_info,
+                                                early_stop=self.settings.get('mcts_early_stop', False),
+                                                use_book=self.settings.get('use_opening_book', False),
+                                                cache=cache,
+                                                progress=self.make_progress_hook())
+                if self.budget_allocator is not None:
+                    self.budget_allocator.record(search_info.get('iterations', 0), win_rates)
                 move_symbol = "🪨" if best_move == "rock" else "📄" if best_move == "paper" else "✂️"
                 
                 # Emit selected move for web UI
@@ -436,9 +537,11 @@ class GameManager:
                     break
                 
                 # Parse the round result
+                self.last_round_moves = None
                 if move_response["data"].get("moves"):
                     player_move = move_response["data"]["moves"][0].get("move")
                     enemy_move = move_response["data"]["moves"][1].get("move")
+                    self.last_round_moves = (player_move, enemy_move)
                     outcome = determine_outcome(player_move, enemy_move)
                     
                     p_symbol = "🪨" if player_move == "rock" else "📄" if player_move == "paper" else "✂️"
@@ -459,6 +562,7 @@ class GameManager:
                 # Check if enemy was defeated
                 new_state, _, _ = self.state_manager.extract_game_state(run)
                 if new_state["enemy_health"] <= 0:
+                    self.end_fight()
                     self.total_enemies_defeated += 1
                     print(colored(f"\n🏆 ENEMY DEFEATED! (Total: {self.total_enemies_defeated})", 'green', attrs=['bold']))
                 
@@ -483,11 +587,17 @@ class GameManager:
                 print(colored("\nUnique Loot Acquired:", 'yellow', attrs=['bold']))
                 for i, loot in enumerate(self.loot_history):
                     print(colored(f"  {i+1}. {loot}", 'cyan'))
+            
+            if self.budget_allocator is not None:
+                budget = self.budget_allocator.summary()
+                print(colored(f"MCTS Budget: {budget['iterations']} iterations over {budget['decisions']} moves "
+                              f"(avg {budget['average']:.0f})", 'cyan'))
         
         return {
             "mode": mode,
             "enemies_defeated": self.total_enemies_defeated,
             "final_floor": self.current_floor,
             "final_room": self.current_room,
-            "loot_history": self.loot_history.copy()
+            "loot_history": self.loot_history.copy(),
+            "mcts_budget": self.budget_allocator.summary() if self.budget_allocator is not None else None
         }
\ No newline at end of file
@@ -1,58 +1,88 @@
 from termcolor import colored
-import json
-import os
+
+from enemy_tables import ENEMY_FILES, EnemyTable, get_enemy_table
+
+# Every enemy starts a fight with full charges
+FULL_CHARGES = {'rock': 3, 'paper': 3, 'scissor': 3}
+
+# --- Racing ---
+# Racing spends at most the fixed-mode budget (options x enemies x sim_iterations) in rounds:
+# the first gives every cell sim_iterations // RACE_FIRST_ROUND_DIVISOR rollouts (at least
+# RACE_MIN_SAMPLES), each later round doubles the survivors' samples, and an option is dropped
+# once its score's upper bound falls below the leader's lower bound (RACE_CONFIDENCE std devs)
+RACE_FIRST_ROUND_DIVISOR = 8
+RACE_MIN_SAMPLES = 8
+RACE_CONFIDENCE = 2.0
+
+
+def cell_seeds(rng, count):
+    """Independent seeds for `count` grid cells drawn from rng (None without an rng)."""
+    if rng is None:
+        return [None] * count
+    return [int(s) for s in rng.integers(0, 2 ** 63, size=count)]
+
+
+def evaluate_cell_chunk(cells):
+    """
+    Win rates for a list of (loot_option, state_data, player_move_stats,
+    enemy_move_stats, player_charges, enemy_charges, num_simulations, seed) cells.
+    Module level so it can run in a worker process.
+    """
+    import numpy as np
+    rates = []
+    for *args, num_simulations, seed in cells:
+        rng = np.random.default_rng(seed) if seed is not None else None
+        rates.append(LootManager.evaluate_loot_option(*args, num_simulations=num_simulations, rng=rng))
+    return rates
+
+
+def chunk_cells(cells, chunks):
+    """Splits cells into at most `chunks` contiguous lists of near-equal size."""
+    size = -(-len(cells) // max(1, chunks))
+    return [cells[i:i + size] for i in range(0, len(cells), size)] if cells else []
+
+
+def evaluate_cells(cells, workers=1):
+    """
+    Win rate of every cell in order. workers > 1 spreads the cells across the
+    warm process pool of mcts_parallel; seeded cells give the same rates either way.
+    """
+    if workers <= 1 or len(cells) <= 1:
+        return evaluate_cell_chunk(cells)
+    from mcts_parallel import get_pool
+    return [rate for chunk in get_pool(workers).map(evaluate_cell_chunk, chunk_cells(cells, workers))
+            for rate in chunk]
+
 
 class LootManager:
-    def __init__(self):
-        # Load enemy stats from the JSON file
+    def __init__(self, mode="underhaul"):
+        self.set_mode(mode)
+    
+    def set_mode(self, mode):
+        """Scores loot against `mode`'s enemies (modes without their own stats file, e.g. gigus, use underhaul's)"""
+        if mode not in ENEMY_FILES:
+            mode = "underhaul"
+        self.mode = mode
+        # Enemy tables are parsed once per process and shared by every LootManager
         try:
-            with open('underhaul_enemy_stats.json', 'r') as f:
-                self.enemy_data = json.load(f)['enemies']
-            print(colored("✅ Enemy stats loaded successfully from enemy_stats.json", 'green'))
+            self.enemy_table = get_enemy_table(mode)
         except Exception as e:
             print(colored(f"❌ Error loading enemy stats: {e}", 'red'))
-            # Fallback to empty dict if file can't be loaded
-            self.enemy_data = {}
+            # Fallback to an empty table if the file can't be loaded
+            self.enemy_table = EnemyTable(mode, [])
     
     def get_future_enemies(self, current_floor, current_room):
         """
-        Get a list of all enemies that are in future rooms/floors
+        Get the (enemy, weight) pairs for all enemies in future rooms/floors (precomputed, read-only)
         """
-        future_enemies = []
-        
-        # Convert to int for easier comparison
-        floor_num = int(current_floor)
-        room_num = int(current_room)
-        
-        # Iterate through all floors and rooms to find future enemies
-        for f in range(1, 5):  # Floors 1-3
-            # Skip if we've already covered this floor
-            if f < floor_num:
-                continue
-                
-            floor_key = f"floor_{f}"
-            if floor_key in self.enemy_data:
-                for r in range(1, 5):  # Rooms 1-4
-                    # Skip if we're on the current floor and haven't reached this room yet
-                    if f == floor_num and r <= room_num:
-                        continue
-                        
-                    room_key = f"room_{r}"
-                    if room_key in self.enemy_data[floor_key]:
-                        enemy = self.enemy_data[floor_key][room_key]
-                        future_enemies.append({
-                            'floor': f,
-                            'room': r,
-                            'stats': enemy
-                        })
-        
-        return future_enemies
+        return self.enemy_table.future(current_floor, current_room)
     
     @staticmethod
-    def evaluate_loot_option(loot_option, state_data, player_move_stats, enemy_move_stats, player_charges, enemy_charges, num_simulations=100):
-        """Evaluates a loot option by running simulations"""
+    def evaluate_loot_option(loot_option, state_data, player_move_stats, enemy_move_stats, player_charges, enemy_charges, num_simulations=100, rng=None):
+        """Evaluates a loot option by running simulations (rng: optional numpy Generator for reproducible runs)"""
         from state_manager import StateManager
-        from mcts_api_v2 import GameState, simulate
+        from mcts_api_v2 import GameState
+        from batch_rollout import simulate_batch
         
         # Apply the loot upgrade to state and move stats
         new_state_data, new_player_move_stats = LootManager.apply_loot_to_state(loot_option, state_data, player_move_stats)
@@ -78,11 +108,8 @@ class LootManager:
         state.player_charges = player_charges
         state.enemy_charges = enemy_charges
 
-        # Run simulations
-        wins = 0
-        for _ in range(num_simulations):
-            wins += simulate(state)
-        win_rate = wins / num_simulations
+        # Run all simulations as one batch
+        win_rate = simulate_batch(state, num_simulations, rng)
         return win_rate
     
     @staticmethod
@@ -117,11 +144,40 @@ class LootManager:
 
         return new_state, new_stats
     
-    def evaluate_loot_against_future_enemies(self, loot_option, state_data, player_move_stats, current_floor, current_room, player_charges, sim_iterations=25):
+    def evaluate_loot_against_future_enemies(self, loot_option, state_data, player_move_stats, current_floor, current_room, player_charges, sim_iterations=25, rng=None):
         """
         Evaluates a loot option by simulating against all future enemies
         Returns a weighted average win rate
         """
+        cells = self.future_enemy_cells(loot_option, state_data, player_move_stats, current_floor, current_room,
+                                        player_charges, sim_iterations, rng=rng)
+        return self.score_against_future_enemies(loot_option, state_data, current_floor, current_room,
+                                                 evaluate_cells(cells))
+    
+    def future_enemy_cells(self, loot_option, state_data, player_move_stats, current_floor, current_room, player_charges, sim_iterations=25, rng=None):
+        """
+        The independent simulation tasks behind evaluate_loot_against_future_enemies:
+        one evaluate_cell_chunk() cell per future enemy, each seeded from rng
+        """
+        future_enemies = self.get_future_enemies(current_floor, current_room)
+        cells = []
+        for future_enemy, seed in zip(future_enemies, cell_seeds(rng, len(future_enemies))):
+            enemy = future_enemy.enemy
+            # Prepare a new state_data with this enemy's stats
+            enemy_state_data = state_data.copy()
+            enemy_state_data["enemy_health"] = enemy.health
+            enemy_state_data["enemy_shield"] = enemy.shield
+            enemy_state_data["enemy_max_health"] = enemy.health
+            enemy_state_data["enemy_max_shield"] = enemy.shield
+            cells.append((loot_option, enemy_state_data, player_move_stats, enemy.move_stats_dict(),
+                          player_charges, dict(FULL_CHARGES), sim_iterations, seed))
+        return cells
+    
+    def score_against_future_enemies(self, loot_option, state_data, current_floor, current_room, win_rates):
+        """
+        Reduces the per-enemy win rates of future_enemy_cells() to the weighted
+        average win rate, including the wasted-heal penalty
+        """
         future_enemies = self.get_future_enemies(current_floor, current_room)
         
         if not future_enemies:
@@ -130,16 +186,9 @@ class LootManager:
             return 0.5
         
         # Check for wasted healing
-        boon_type = loot_option.get("boonTypeString", "")
-        if boon_type == "Heal":
-            health_ratio = state_data["player_health"] / state_data["player_max_health"]
-            heal_amount = loot_option.get("selectedVal1", 0)
-            max_usable_heal = state_data["player_max_health"] - state_data["player_health"]
-            
-            # If healing would be mostly wasted, apply a penalty
-            if max_usable_heal < (heal_amount * 0.5):  # If more than 50% would be wasted
-                waste_penalty = 1.0 - (max_usable_heal / heal_amount)
-                print(colored(f"⚠️ Heal would be {waste_penalty*100:.0f}% wasted (Health: {state_data['player_health']}/{state_data['player_max_health']})", 'yellow'))
+        waste_penalty = self.heal_waste_penalty(loot_option, state_data)
+        if waste_penalty > 0:
+            print(colored(f"⚠️ Heal would be {waste_penalty*100:.0f}% wasted (Health: {state_data['player_health']}/{state_data['player_max_health']})", 'yellow'))
         
         # Track the total win rate and weights
         total_weighted_rate = 0
@@ -149,38 +198,10 @@ class LootManager:
         enemy_results = []
         
         # Evaluate against each future enemy with distance-based weighting
-        for enemy_data in future_enemies:
-            floor = enemy_data['floor']
-            room = enemy_data['room']
-            enemy = enemy_data['stats']
-            
-            # Closer enemies are more important than distant ones
-            # Base weight starts at 4.0 and decreases by 0.5 for each room away
-            distance = ((floor - current_floor) * 4) + (room - current_room)
-            weight = max(0.5, 4.0 - (distance * 0.5))
-            
-            # Create enemy move stats in the expected format
-            enemy_move_stats = {
-                "rock": {"damage": enemy['moves']['rock']['damage'], "shield": enemy['moves']['rock']['shield']},
-                "paper": {"damage": enemy['moves']['paper']['damage'], "shield": enemy['moves']['paper']['shield']},
-                "scissor": {"damage": enemy['moves']['scissor']['damage'], "shield": enemy['moves']['scissor']['shield']}
-            }
-            
-            # Create enemy charges (assuming all enemies start with full charges)
-            enemy_charges = {'rock': 3, 'paper': 3, 'scissor': 3}
-            
-            # Prepare a new state_data with this enemy's stats
-            enemy_state_data = state_data.copy()
-            enemy_state_data["enemy_health"] = enemy['health']
-            enemy_state_data["enemy_shield"] = enemy['shield']
-            enemy_state_data["enemy_max_health"] = enemy['health']
-            enemy_state_data["enemy_max_shield"] = enemy['shield']
-            
-            # Run the evaluation
-            win_rate = self.evaluate_loot_option(
-                loot_option, enemy_state_data, player_move_stats, enemy_move_stats, 
-                player_charges, enemy_charges, num_simulations=sim_iterations
-            )
+        for future_enemy, win_rate in zip(future_enemies, win_rates):
+            enemy = future_enemy.enemy
+            # Closer enemies are more important than distant ones (see enemy_tables.distance_weight)
+            weight = future_enemy.weight
             
             # Track for weighted average
             total_weighted_rate += (win_rate * weight)
@@ -188,7 +209,7 @@ class LootManager:
             
             # Store for logging
             enemy_results.append({
-                'location': f"Floor {floor} Room {room}",
+                'location': f"Floor {enemy.floor} Room {enemy.room}",
                 'win_rate': win_rate,
                 'weight': weight
             })
@@ -200,7 +221,7 @@ class LootManager:
             final_rate = 0
         
         # Apply penalty for wasted healing
-        if boon_type == "Heal" and max_usable_heal < (heal_amount * 0.5):
+        if waste_penalty > 0:
             final_rate *= (1.0 - waste_penalty * 0.5)  # Apply partial penalty
             
         # Print detailed results for debugging
@@ -212,8 +233,19 @@ class LootManager:
         
         return final_rate
     
-    def select_best_loot_option(self, loot_options, state_data, player_move_stats, enemy_move_stats, player_charges, enemy_charges, sim_iterations=100, current_floor=1, current_room=1):
-        """Selects the best loot option based on health status and simulations"""
+    def select_best_loot_option(self, loot_options, state_data, player_move_stats, enemy_move_stats, player_charges, enemy_charges, sim_iterations=100, current_floor=1, current_room=1, seed=None, workers=1, evaluate=None, racing=False, search_info=None):
+        """
+        Selects the best loot option based on health status and simulations (same seed, same choice)
+        The whole (option, future enemy) grid is simulated at once: workers > 1 spreads it across
+        the warm process pool, or evaluate(cells) -> win rates can run it elsewhere
+        racing=True races the options in growing rounds instead (see race_loot_options)
+        A dict passed as search_info receives the rollouts spent, rounds and eliminated actions
+        """
+        rng = None
+        if seed is not None:
+            import numpy as np
+            rng = np.random.default_rng(seed)
+        
         # First assign the correct action to each loot option based on index
         for i, option in enumerate(loot_options):
             if i == 0:
@@ -242,6 +274,44 @@ class LootManager:
         
         print(colored(f"\nEvaluating {len(filtered_options)} loot options...", 'cyan'))
         
+        if evaluate is None:
+            evaluate = lambda cells: evaluate_cells(cells, workers)
+        
+        evaluated = [i for i, loot in enumerate(filtered_options) if not self.is_wasted_heal(loot, state_data)]
+        option_rates = [None] * len(filtered_options)
+        eliminated = set()
+        unraced = racing and len(evaluated) == 1
+        if unraced:
+            # A single option left after the heal check needs no race
+            option_rates[evaluated[0]] = []
+            rollouts, rounds = 0, 0
+        elif racing:
+            race_rates, race_eliminated, rollouts, rounds = self.race_loot_options(
+                [filtered_options[i] for i in evaluated], state_data, player_move_stats, current_floor,
+                current_room, player_charges, sim_iterations, rng, evaluate
+            )
+            for i, rates in zip(evaluated, race_rates):
+                option_rates[i] = rates
+            eliminated = {evaluated[j] for j in race_eliminated}
+        else:
+            # Simulate every (option, future enemy) pair in one go, then score the options in order
+            option_cells = [self.future_enemy_cells(filtered_options[i], state_data, player_move_stats, current_floor,
+                                                    current_room, player_charges, sim_iterations, rng=rng)
+                            for i in evaluated]
+            cells = [cell for per_option in option_cells for cell in per_option]
+            win_rates = evaluate(cells)
+            offset = 0
+            for i, per_option in zip(evaluated, option_cells):
+                option_rates[i] = win_rates[offset:offset + len(per_option)]
+                offset += len(per_option)
+            rollouts, rounds = len(cells) * sim_iterations, 1
+        
+        if search_info is not None:
+            search_info["rollouts"] = rollouts
+            search_info["rounds"] = rounds
+            search_info["racing"] = racing
+            search_info["eliminated"] = [filtered_options[i].get("action") for i in sorted(eliminated)]
+        
         best_option = None
         best_rate = -1000000000
         
@@ -254,25 +324,29 @@ class LootManager:
             description = self.get_loot_description(boon_type, val1, val2)
             
             # Check for wasted healing
-            if boon_type == "Heal" and health_ratio > 0.9:
+            if option_rates[i] is None:
                 max_usable_heal = state_data["player_max_health"] - state_data["player_health"]
                 waste_percentage = max(0, 1 - (max_usable_heal / val1))
-                
-                if waste_percentage > 0.7:  # More than 70% wasted
-                    print(colored(f"  [{i+1}] {description} - Win rate: 0.000 (Healing would be {waste_percentage*100:.0f}% wasted!)", 'yellow'))
-                    rate = 0.0  # Severely penalize
-                    continue
+                print(colored(f"  [{i+1}] {description} - Win rate: 0.000 (Healing would be {waste_percentage*100:.0f}% wasted!)", 'yellow'))
+                continue
+            
+            if unraced:
+                print(colored(f"  [{i+1}] {description} - only option left, not raced", 'cyan'))
+                best_option = loot
+                continue
             
-            # Evaluate option against future enemies
-            rate = self.evaluate_loot_against_future_enemies(
-                loot, state_data, player_move_stats, current_floor, current_room, 
-                player_charges, sim_iterations
+            # Score option against future enemies
+            rate = self.score_against_future_enemies(
+                loot, state_data, current_floor, current_room, option_rates[i]
             )
             
+            if i in eliminated:
+                print(colored(f"  [{i+1}] {description} - Win rate: {rate:.3f} (eliminated while racing)", 'yellow'))
+                continue
+            
             # Boost rating for health options when health is low
-            if health_ratio < 0.6 and boon_type == "Heal":
-                # The lower the health, the higher the boost
-                health_boost = (1.0 - health_ratio) * 0.3
+            health_boost = self.low_health_boost(loot, health_ratio)
+            if health_boost > 0:
                 rate += health_boost
                 print(colored(f"  [{i+1}] {description} - Win rate: {rate:.3f} (boosted due to low health)", 'green'))
             else:
@@ -289,9 +363,116 @@ class LootManager:
         # Display the selected action for verification
         action = best_option.get("action", "Unknown")
         print(colored(f"  Action to execute: {action}", 'cyan'))
+        if racing:
+            print(colored(f"  Racing: {rollouts} rollouts in {rounds} rounds", 'cyan'))
         
         return best_option
     
+    def race_loot_options(self, candidates, state_data, player_move_stats, current_floor, current_room, player_charges, sim_iterations, rng, evaluate):
+        """
+        Successive-halving race between candidates within the fixed-mode rollout budget
+        Returns (per-enemy win rates per candidate, indices of eliminated candidates,
+        rollouts spent, rounds played); stops once a single candidate survives or
+        the next round no longer fits in the budget. A single candidate is not raced
+        (no rates, nothing spent)
+        """
+        future_enemies = self.get_future_enemies(current_floor, current_room)
+        health_ratio = state_data["player_health"] / state_data["player_max_health"]
+        budget = len(candidates) * len(future_enemies) * sim_iterations
+        wins = [[0.0] * len(future_enemies) for _ in candidates]
+        samples = [0] * len(candidates)
+        alive = list(range(len(candidates)))
+        if len(candidates) <= 1 or sim_iterations <= 0:
+            return [[] for _ in candidates], [], 0, 0
+        # The first round never costs more than the fixed-mode budget
+        round_size = min(sim_iterations, max(RACE_MIN_SAMPLES, sim_iterations // RACE_FIRST_ROUND_DIVISOR))
+        spent = 0
+        rounds = 0
+        
+        while alive and future_enemies:
+            round_cost = len(alive) * len(future_enemies) * round_size
+            if rounds > 0 and spent + round_cost > budget:
+                # Spend what is left on a last, smaller round if it is still worth it
+                round_size = (budget - spent) // (len(alive) * len(future_enemies))
+                if round_size < RACE_MIN_SAMPLES:
+                    break
+                round_cost = len(alive) * len(future_enemies) * round_size
+            
+            option_cells = [self.future_enemy_cells(candidates[j], state_data, player_move_stats, current_floor,
+                                                    current_room, player_charges, round_size, rng=rng)
+                            for j in alive]
+            win_rates = evaluate([cell for per_option in option_cells for cell in per_option])
+            for k, j in enumerate(alive):
+                for e in range(len(future_enemies)):
+                    wins[j][e] += win_rates[k * len(future_enemies) + e] * round_size
+                samples[j] += round_size
+            spent += round_cost
+            rounds += 1
+            
+            # Drop every option whose upper bound is below the leader's lower bound
+            bounds = {j: self.race_bounds(candidates[j], state_data, health_ratio, future_enemies, wins[j], samples[j])
+                      for j in alive}
+            leader_lower = max(lower for lower, _ in bounds.values())
+            alive = [j for j in alive if bounds[j][1] >= leader_lower]
+            print(colored(f"  Racing round {rounds}: {round_size} rollouts per enemy, {len(alive)} options left", 'cyan'))
+            if len(alive) <= 1:
+                break
+            # Double the survivors' samples per enemy
+            round_size = samples[alive[0]]
+        
+        rates = [[w / samples[j] if samples[j] else 0.0 for w in wins[j]] for j in range(len(candidates))]
+        eliminated = [j for j in range(len(candidates)) if j not in alive]
+        return rates, eliminated, spent, rounds
+    
+    def race_bounds(self, loot_option, state_data, health_ratio, future_enemies, wins, samples):
+        """
+        (lower, upper) confidence bounds of an option's final score: the weighted
+        win rate with its heal penalty and low-health boost, using smoothed
+        binomial variances so a few all-loss samples do not look certain
+        """
+        total_weight = sum(future_enemy.weight for future_enemy in future_enemies)
+        mean = 0.0
+        variance = 0.0
+        for future_enemy, enemy_wins in zip(future_enemies, wins):
+            share = future_enemy.weight / total_weight
+            smoothed = (enemy_wins + 1) / (samples + 2)
+            mean += share * enemy_wins / samples
+            variance += share * share * smoothed * (1 - smoothed) / samples
+        scale = 1.0 - self.heal_waste_penalty(loot_option, state_data) * 0.5
+        score = mean * scale + self.low_health_boost(loot_option, health_ratio)
+        half_width = RACE_CONFIDENCE * scale * variance ** 0.5
+        return score - half_width, score + half_width
+    
+    @staticmethod
+    def heal_waste_penalty(loot_option, state_data):
+        """Fraction of a Heal that would be wasted, when that is more than 50% (0.0 otherwise)"""
+        if loot_option.get("boonTypeString", "") != "Heal":
+            return 0.0
+        heal_amount = loot_option.get("selectedVal1", 0)
+        max_usable_heal = state_data["player_max_health"] - state_data["player_health"]
+        if max_usable_heal < (heal_amount * 0.5):  # If more than 50% would be wasted
+            return 1.0 - (max_usable_heal / heal_amount)
+        return 0.0
+    
+    @staticmethod
+    def low_health_boost(loot_option, health_ratio):
+        """Bonus for Heal options below 60% health: the lower the health, the higher the boost"""
+        if health_ratio < 0.6 and loot_option.get("boonTypeString") == "Heal":
+            return (1.0 - health_ratio) * 0.3
+        return 0.0
+    
+    @staticmethod
+    def is_wasted_heal(loot_option, state_data):
+        """True for a Heal at >90% health that would waste more than 70% of its amount (never simulated)"""
+        if loot_option.get("boonTypeString") != "Heal":
+            return False
+        health_ratio = state_data["player_health"] / state_data["player_max_health"]
+        if health_ratio <= 0.9:
+            return False
+        max_usable_heal = state_data["player_max_health"] - state_data["player_health"]
+        waste_percentage = max(0, 1 - (max_usable_heal / loot_option.get("selectedVal1", 0)))
+        return waste_percentage > 0.7  # More than 70% wasted
+    
     @staticmethod
     def get_loot_description(boon_type, val1, val2):
         """Format a human-readable description of a loot option"""
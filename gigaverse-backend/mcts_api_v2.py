@@ -1,10 +1,26 @@
 import math
 import random
-import copy
 import time
 
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
 # --- Global Game Parameter ---
 MAX_ROUNDS = 20  # Maximum rounds to simulate
+MOVES = ("rock", "paper", "scissor")
+
+def make_rng(seed=None):
+    """
+    Random stream for one search: a private random.Random(seed) when a seed is
+    given (reproducible runs), otherwise the shared module-level stream.
+    """
+    return random.Random(seed) if seed is not None else random
+
+# --- Early Stopping ---
+EARLY_STOP_MIN_ITERATIONS = 1000   # Never trust the root statistics before this many iterations
+EARLY_STOP_CHECK_INTERVAL = 250    # Re-check the stop criteria every N iterations
 
 def determine_outcome(player_move, enemy_move):
     """
@@ -65,7 +81,66 @@ def get_counter_move(move):
     return None
 
 # --- Game State Definition ---
+DEFAULT_PLAYER_MOVE_STATS = {
+    "rock": {"damage": 15, "shield": 6},
+    "paper": {"damage": 0, "shield": 4},
+    "scissor": {"damage": 2, "shield": 2}
+}
+DEFAULT_ENEMY_MOVE_STATS = {
+    "rock": {"damage": 4, "shield": 0},
+    "paper": {"damage": 0, "shield": 4},
+    "scissor": {"damage": 2, "shield": 2}
+}
+# Cooldowns are no longer used by the game; one shared read-only dict is kept for compatibility
+NO_COOLDOWNS = {'rock': 0, 'paper': 0, 'scissor': 0}
+
+def build_round_table(player_move_stats, enemy_move_stats):
+    """
+    Precompiles apply_round() for one pair of move stat tables:
+    table[player_move][enemy_move] = (player_scores, enemy_scores, player_damage,
+    player_shield_bonus, enemy_damage, enemy_shield_bonus). A side "scores" when
+    it wins or ties the exchange, i.e. gains its shield bonus and deals its damage.
+    """
+    table = {}
+    for player_move, player_stats in player_move_stats.items():
+        row = table[player_move] = {}
+        for enemy_move, enemy_stats in enemy_move_stats.items():
+            outcome = determine_outcome(player_move, enemy_move)
+            row[enemy_move] = (outcome != "enemy", outcome != "player",
+                               player_stats["damage"], player_stats["shield"],
+                               enemy_stats["damage"], enemy_stats["shield"])
+    return table
+
+class CombatContext:
+    """
+    Everything derived from the move stats alone: the round table plus the stat
+    lookups and enemy-threat invariants the search heuristics use. Move stats
+    never change during a search, so this is built once per root state and
+    shared by every clone.
+    """
+    __slots__ = ("round_table", "player_damage", "player_shield", "highest_player_damage",
+                 "strongest_enemy_move", "strongest_damage", "counter_to_strongest")
+
+    def __init__(self, player_move_stats, enemy_move_stats):
+        self.round_table = build_round_table(player_move_stats, enemy_move_stats)
+        self.player_damage = {move: stats["damage"] for move, stats in player_move_stats.items()}
+        self.player_shield = {move: stats["shield"] for move, stats in player_move_stats.items()}
+        self.highest_player_damage = max(self.player_damage.values())
+        self.strongest_enemy_move, self.strongest_damage = get_enemy_strongest_attack(enemy_move_stats)
+        self.counter_to_strongest = get_counter_move(self.strongest_enemy_move)
+
 class GameState:
+    """
+    Compact combat state. HP, shield and round are plain ints and the charge dicts
+    are tiny, so clone() is a handful of copies. Move stats never change during a
+    search and are shared by reference between clones, together with the
+    CombatContext precompiled from them.
+    """
+    __slots__ = ("player_health", "player_shield", "enemy_health", "enemy_shield",
+                 "player_max_health", "player_max_shield", "enemy_max_health", "enemy_max_shield",
+                 "round_number", "player_charges", "enemy_charges",
+                 "player_move_stats", "enemy_move_stats", "context")
+
     def __init__(self, player_health, player_shield, enemy_health, enemy_shield,
                  player_max_health, player_max_shield, enemy_max_health, enemy_max_shield,
                  round_number=1, player_move_stats=None, enemy_move_stats=None):
@@ -79,23 +154,21 @@ class GameState:
         self.enemy_max_shield = enemy_max_shield
         self.round_number = round_number
 
-        # Initialize charges (cooldowns no longer used but kept for compatibility)
         self.player_charges = {'rock': 3, 'paper': 3, 'scissor': 3}
         self.enemy_charges = {'rock': 3, 'paper': 3, 'scissor': 3}
-        self.player_cooldowns = {'rock': 0, 'paper': 0, 'scissor': 0}
-        self.enemy_cooldowns = {'rock': 0, 'paper': 0, 'scissor': 0}
 
         # Use provided move stats or default values.
-        self.player_move_stats = player_move_stats if player_move_stats is not None else {
-            "rock": {"damage": 15, "shield": 6},
-            "paper": {"damage": 0, "shield": 4},
-            "scissor": {"damage": 2, "shield": 2}
-        }
-        self.enemy_move_stats = enemy_move_stats if enemy_move_stats is not None else {
-            "rock": {"damage": 4, "shield": 0},
-            "paper": {"damage": 0, "shield": 4},
-            "scissor": {"damage": 2, "shield": 2}
-        }
+        self.player_move_stats = player_move_stats if player_move_stats is not None else DEFAULT_PLAYER_MOVE_STATS
+        self.enemy_move_stats = enemy_move_stats if enemy_move_stats is not None else DEFAULT_ENEMY_MOVE_STATS
+        self.context = CombatContext(self.player_move_stats, self.enemy_move_stats)
+
+    @property
+    def player_cooldowns(self):
+        return NO_COOLDOWNS
+
+    @property
+    def enemy_cooldowns(self):
+        return NO_COOLDOWNS
 
     def is_terminal(self):
         """
@@ -105,8 +178,46 @@ class GameState:
                 self.enemy_health <= 0 or 
                 self.round_number >= MAX_ROUNDS)
 
+    def key(self):
+        """Canonical hashable tuple of everything that changes during a fight."""
+        pc, ec = self.player_charges, self.enemy_charges
+        return (self.player_health, self.player_shield, self.enemy_health, self.enemy_shield,
+                pc["rock"], pc["paper"], pc["scissor"], ec["rock"], ec["paper"], ec["scissor"],
+                self.round_number)
+
     def clone(self):
-        return copy.deepcopy(self)
+        new = GameState.__new__(GameState)
+        new.player_health = self.player_health
+        new.player_shield = self.player_shield
+        new.enemy_health = self.enemy_health
+        new.enemy_shield = self.enemy_shield
+        new.player_max_health = self.player_max_health
+        new.player_max_shield = self.player_max_shield
+        new.enemy_max_health = self.enemy_max_health
+        new.enemy_max_shield = self.enemy_max_shield
+        new.round_number = self.round_number
+        new.player_charges = self.player_charges.copy()
+        new.enemy_charges = self.enemy_charges.copy()
+        # Move stats are immutable during a search - share them
+        new.player_move_stats = self.player_move_stats
+        new.enemy_move_stats = self.enemy_move_stats
+        new.context = self.context
+        return new
+
+def state_signature(state, include_round=True):
+    """
+    Compact string key of everything a search from `state` depends on: the fight
+    state, the maxima and both sides' move stats. Used by the opening book and
+    the decision cache.
+    """
+    pms, ems = state.player_move_stats, state.enemy_move_stats
+    fight = state.key() if include_round else state.key()[:-1]
+    values = fight + (
+        state.player_max_health, state.player_max_shield, state.enemy_max_health, state.enemy_max_shield,
+        *(pms[m]["damage"] for m in MOVES), *(pms[m]["shield"] for m in MOVES),
+        *(ems[m]["damage"] for m in MOVES), *(ems[m]["shield"] for m in MOVES),
+    )
+    return ",".join(map(str, values))
 
 def apply_round(state, player_move, enemy_move):
     """
@@ -115,57 +226,43 @@ def apply_round(state, player_move, enemy_move):
       2. Determines outcome via rock-paper-scissors
       3. Applies shield bonus and damage (damage subtracts from shield first)
       4. Increments round number if the state is non-terminal
+    Outcome, damage and shield bonuses come from the state's precompiled round table
+    (see CombatContext).
     """
-    # Update move charges - new charge mechanics
-    state.player_charges, _ = update_charges(state.player_charges,
-                                            state.player_cooldowns,
-                                            player_move)
-    state.enemy_charges, _ = update_charges(state.enemy_charges,
-                                          state.enemy_cooldowns,
-                                          enemy_move)
-                                          
-    outcome = determine_outcome(player_move, enemy_move)
-    
-    p_damage = state.player_move_stats[player_move]["damage"]
-    p_shield_bonus = state.player_move_stats[player_move]["shield"]
-    e_damage = state.enemy_move_stats[enemy_move]["damage"]
-    e_shield_bonus = state.enemy_move_stats[enemy_move]["shield"]
-    
-    if outcome == "player":
-        state.player_shield = min(state.player_shield + p_shield_bonus, state.player_max_shield)
-        if state.enemy_shield >= p_damage:
-            state.enemy_shield -= p_damage
-        else:
-            remaining = p_damage - state.enemy_shield
-            state.enemy_shield = 0
-            state.enemy_health = max(state.enemy_health - remaining, 0)
-            
-    elif outcome == "enemy":
-        state.enemy_shield = min(state.enemy_shield + e_shield_bonus, state.enemy_max_shield)
-        if state.player_shield >= e_damage:
-            state.player_shield -= e_damage
-        else:
-            remaining = e_damage - state.player_shield
-            state.player_shield = 0
-            state.player_health = max(state.player_health - remaining, 0)
-            
-    elif outcome == "tie":
+    # Update move charges - chosen move -1, the others +1 (max 3)
+    charges = state.player_charges
+    for move, charge in charges.items():
+        if move != player_move:
+            charges[move] = charge + 1 if charge < 3 else 3
+    charges[player_move] -= 1
+    charges = state.enemy_charges
+    for move, charge in charges.items():
+        if move != enemy_move:
+            charges[move] = charge + 1 if charge < 3 else 3
+    charges[enemy_move] -= 1
+
+    player_scores, enemy_scores, p_damage, p_shield_bonus, e_damage, e_shield_bonus = \
+        state.context.round_table[player_move][enemy_move]
+
+    # Shield bonuses land before damage; on a tie both sides gain and deal
+    if player_scores:
         state.player_shield = min(state.player_shield + p_shield_bonus, state.player_max_shield)
+    if enemy_scores:
         state.enemy_shield = min(state.enemy_shield + e_shield_bonus, state.enemy_max_shield)
+    if player_scores:
         if state.enemy_shield >= p_damage:
             state.enemy_shield -= p_damage
         else:
             remaining = p_damage - state.enemy_shield
             state.enemy_shield = 0
             state.enemy_health = max(state.enemy_health - remaining, 0)
+    if enemy_scores:
         if state.player_shield >= e_damage:
             state.player_shield -= e_damage
         else:
             remaining = e_damage - state.player_shield
             state.player_shield = 0
             state.player_health = max(state.player_health - remaining, 0)
-        if state.player_health <= 0:
-            state.player_health = 0
     
     if not state.is_terminal():
         state.round_number += 1
@@ -173,18 +270,234 @@ def apply_round(state, player_move, enemy_move):
     return state
 
 # --- MCTS Implementation ---
-class Node:
-    def __init__(self, state, parent=None, move=None):
-        self.state = state      # The game state at this node.
-        self.parent = parent    # Parent node.
-        self.move = move        # The player's move taken to reach this node.
-        self.children = []      # Child nodes.
-        self.wins = 0           # Number of wins recorded.
-        self.visits = 0         # Number of simulations passing through this node.
-
-    def is_fully_expanded(self):
-        possible_moves = get_player_possible_moves(self.state)
-        return len(self.children) == len(possible_moves)
+MOVE_INDEX = {move: i for i, move in enumerate(MOVES)}
+
+# Default node capacity of a search tree (~56 bytes per node, so ~34MB when full)
+ARENA_CAPACITY = 600000
+# Starting size of arenas that grow on demand (SearchSession trees, copied subtrees)
+GROWING_ARENA_CAPACITY = 1024
+
+class NodeArena:
+    """
+    Struct-of-arrays MCTS tree. Node i is described by parallel arrays: parent,
+    move, its block of child slots and its visit/win counters. Children of a node
+    are reserved as one contiguous block the first time it gets a child, so they
+    are the range first_child[i] .. first_child[i] + child_count[i].
+
+    Levels alternate between decision and chance nodes. The root and every
+    outcome node are decision nodes: the player picks a move there, and their
+    children are action nodes (move[i] = the player move). Action nodes are chance
+    nodes: their children are one outcome node per enemy reply seen so far
+    (enemy_move[i] = that reply). Outcome node states are never stored - they are
+    derived on descent with apply_round(state, move, enemy_move).
+
+    stat[i] is the node whose visits/wins node i uses - itself, unless a
+    transposition table made it share another node's counters. offensive_bonus,
+    counter_bonus and charge_penalty hold the selection prior of each action node
+    (see selection_prior), computed once when it is created.
+
+    The arrays start with `capacity` slots. With a larger max_capacity they grow
+    (doubling) when a block no longer fits, so a tree only pays for the nodes it
+    uses; allocation fails once max_capacity is reached.
+    """
+    # (array, typecode, initial value) of every per-node array
+    FIELDS = (("parent", 'i', -1), ("move", 'b', -1), ("enemy_move", 'b', -1), ("first_child", 'i', -1),
+              ("child_count", 'b', 0), ("child_slots", 'b', 0), ("stat", 'i', 0), ("visits", 'l', 0),
+              ("wins", 'd', 0.0), ("offensive_bonus", 'd', 0.0), ("counter_bonus", 'd', 0.0),
+              ("charge_penalty", 'd', 0.0))
+
+    def __init__(self, capacity=ARENA_CAPACITY, max_capacity=None):
+        self.capacity = capacity
+        self.max_capacity = max(capacity, max_capacity or capacity)
+        for name, typecode, initial in self.FIELDS:
+            setattr(self, name, array(typecode, [initial]) * capacity)
+        self.size = 0
+        self.allocations = 0
+        self.root = self._allocate(1)
+
+    def __len__(self):
+        return self.size
+
+    def reserve(self, capacity):
+        """Grows the arrays in place to `capacity` slots (at most max_capacity); never shrinks."""
+        capacity = min(capacity, self.max_capacity)
+        extra = capacity - self.capacity
+        if extra <= 0:
+            return
+        for name, typecode, initial in self.FIELDS:
+            getattr(self, name).extend(array(typecode, [initial]) * extra)
+        self.capacity = capacity
+
+    def _allocate(self, count):
+        """Reserves `count` consecutive slots and returns the first, or -1 when full."""
+        start = self.size
+        if start + count > self.capacity:
+            if start + count > self.max_capacity:
+                return -1
+            self.reserve(max(start + count, 2 * self.capacity))
+        for i in range(start, start + count):
+            self.stat[i] = i
+        self.size += count
+        self.allocations += 1
+        return start
+
+    def _add_child(self, node, slots):
+        """
+        Appends a child to node, reserving `slots` child slots when it gets its
+        first child. Returns the child index, or -1 when the arena is full.
+        """
+        count = self.child_count[node]
+        if count == 0:
+            first = self._allocate(slots)
+            if first < 0:
+                return -1
+            self.first_child[node] = first
+            self.child_slots[node] = slots
+        elif count >= self.child_slots[node]:
+            return -1
+        child = self.first_child[node] + count
+        self.child_count[node] = count + 1
+        self.parent[child] = node
+        return child
+
+    def add_action(self, node, move, slots):
+        """Adds the action node for player `move` under decision node `node`."""
+        child = self._add_child(node, slots)
+        if child >= 0:
+            self.move[child] = MOVE_INDEX[move]
+        return child
+
+    def add_outcome(self, action, enemy_move, slots):
+        """Adds the outcome node for enemy reply `enemy_move` under action node `action`."""
+        child = self._add_child(action, slots)
+        if child >= 0:
+            self.enemy_move[child] = MOVE_INDEX[enemy_move]
+        return child
+
+    def find_outcome(self, action, enemy_move):
+        """Outcome node of `action` for enemy reply `enemy_move`, or -1 if not seen yet."""
+        code = MOVE_INDEX[enemy_move]
+        for child in self.children(action):
+            if self.enemy_move[child] == code:
+                return child
+        return -1
+
+    def children(self, node):
+        first = self.first_child[node]
+        return range(first, first + self.child_count[node])
+
+    def node_visits(self, node):
+        return self.visits[self.stat[node]]
+
+    def node_wins(self, node):
+        return self.wins[self.stat[node]]
+
+    def subtree(self, node, capacity=None):
+        """
+        Copies the subtree under `node` into a new arena (node becomes its root)
+        that starts at `capacity` slots (default: grows from a small block) with
+        the same max_capacity. Returns (arena, {old stat index: new stat index})
+        so a transposition table can follow the move.
+        """
+        new = NodeArena(capacity or GROWING_ARENA_CAPACITY, max_capacity=self.max_capacity)
+        stat_map = {self.stat[node]: new.root}
+        new.visits[new.root] = self.node_visits(node)
+        new.wins[new.root] = self.node_wins(node)
+        pending = [(node, new.root)]
+        while pending:
+            old, copy = pending.pop()
+            count = self.child_count[old]
+            if count == 0:
+                continue
+            first = new._allocate(self.child_slots[old])
+            new.first_child[copy] = first
+            new.child_slots[copy] = self.child_slots[old]
+            new.child_count[copy] = count
+            for offset in range(count):
+                old_child = self.first_child[old] + offset
+                child = first + offset
+                new.parent[child] = copy
+                new.move[child] = self.move[old_child]
+                new.enemy_move[child] = self.enemy_move[old_child]
+                new.offensive_bonus[child] = self.offensive_bonus[old_child]
+                new.counter_bonus[child] = self.counter_bonus[old_child]
+                new.charge_penalty[child] = self.charge_penalty[old_child]
+                # Nodes sharing counters keep sharing them in the copy
+                old_stat = self.stat[old_child]
+                if old_stat in stat_map:
+                    new.stat[child] = stat_map[old_stat]
+                else:
+                    stat_map[old_stat] = child
+                    new.visits[child] = self.visits[old_stat]
+                    new.wins[child] = self.wins[old_stat]
+                pending.append((old_child, child))
+        return new, stat_map
+
+def tree_capacity(iterations, max_capacity=ARENA_CAPACITY):
+    """
+    Arena size that can never fill up within `iterations`: each iteration adds at
+    most one action block and one outcome block of three slots. Capped at
+    max_capacity (None = no cap, for offline jobs that can afford the memory).
+    """
+    needed = 6 * iterations + 1
+    return needed if max_capacity is None else min(max_capacity, needed)
+
+@dataclass
+class ChildStats:
+    """Visit/win counters of one root move"""
+    move: str
+    visits: int
+    wins: float
+
+def root_children(arena, node):
+    """ChildStats for every expanded child of `node`, in expansion order."""
+    return [ChildStats(MOVES[arena.move[child]], arena.node_visits(child), arena.node_wins(child))
+            for child in arena.children(node)]
+
+class TranspositionTable:
+    """
+    Maps (state key, player move) to the arena node whose visit and win
+    counters every node playing that move from that state shares, so different
+    move sequences reaching the same combat state pool their statistics.
+    Bounded by max_entries with least-recently-used eviction; nodes keep the
+    counters they already point at when their entry is evicted.
+    """
+    def __init__(self, max_entries=200000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, state, move, node):
+        """Returns the stat index for (state, move), registering `node` as its owner if new."""
+        key = (state.key(), move)
+        stat = self.entries.get(key)
+        if stat is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return stat
+        self.misses += 1
+        self.entries[key] = node
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return node
+
+    def remap(self, stat_map):
+        """Follows NodeArena.subtree(): keeps entries still in the tree under their new index."""
+        self.entries = OrderedDict((key, stat_map[stat]) for key, stat in self.entries.items()
+                                   if stat in stat_map)
+
+    def shift_rounds(self, delta):
+        """Rebases the round_number in every state key by delta (see SearchSession.advance)."""
+        if delta:
+            self.entries = OrderedDict((((*state_key[:-1], state_key[-1] + delta), move), stat)
+                                       for (state_key, move), stat in self.entries.items())
+
+    def __len__(self):
+        return len(self.entries)
+
+def is_fully_expanded(arena, node, state):
+    return arena.child_count[node] == len(get_player_possible_moves(state))
 
 def get_player_possible_moves(state):
     return get_available_moves(state.player_charges, state.player_cooldowns)
@@ -192,79 +505,80 @@ def get_player_possible_moves(state):
 def get_enemy_possible_moves(state):
     return get_available_moves(state.enemy_charges, state.enemy_cooldowns)
 
-def select_best_child(node, exploration_weight=1.4):
-    best_score = -float('inf')
-    best_child = None
-    
-    # Get strongest enemy attack for counter strategy
-    strongest_enemy_move, strongest_damage = get_enemy_strongest_attack(node.state.enemy_move_stats)
-    counter_to_strongest = get_counter_move(strongest_enemy_move)
-    
-    # Calculate player's highest damage move
-    highest_player_damage = max(stats["damage"] for move, stats in node.state.player_move_stats.items())
-    
-    # Calculate potential killing blow - could the player kill in one hit?
-    killing_blow_possible = False
-    potential_killing_moves = []
-    for move, stats in node.state.player_move_stats.items():
-        damage = stats["damage"]
-        # Check if this move could kill given current enemy health/shield
-        if damage > 0 and (damage > node.state.enemy_shield + node.state.enemy_health):
-            killing_blow_possible = True
-            potential_killing_moves.append(move)
+def selection_prior(state, move):
+    """
+    Heuristic part of the selection score for playing `move` from `state`:
+    returns (offensive_bonus, counter_bonus, charge_penalty). It only depends on
+    the parent state, so the tree stores it per child (see NodeArena).
+    """
+    context = state.context
+    strongest_damage = context.strongest_damage
     
     # Assess threat level from enemy's strongest attack
-    player_effective_health = node.state.player_health + node.state.player_shield
+    player_effective_health = state.player_health + state.player_shield
     threat_level = strongest_damage / player_effective_health if player_effective_health > 0 else 1.0
     # Adjust based on absolute damage value - very low damage attacks aren't threatening
     if strongest_damage < 5:
         threat_level *= 0.5  # Reduce threat level for weak attacks
     
-    for child in node.children:
-        # Basic UCT formula
-        exploitation = child.wins / child.visits if child.visits > 0 else 0
-        exploration = math.sqrt(math.log(node.visits) / child.visits) if child.visits > 0 else float('inf')
-        
-        # MUCH STRONGER charge management penalty
-        charge_penalty = 0
-        if child.move in node.state.player_charges:
-            # Critical penalty if move would deplete charge to -1 (charge is 1)
-            if node.state.player_charges[child.move] == 1:
-                charge_penalty = 0.8  # Very severe penalty - almost always avoid
-            # Significant penalty if charge would go to 0 (charge is 2)
-            elif node.state.player_charges[child.move] == 2:
-                charge_penalty = 0.3  # Still a significant penalty
-        
-        # Offensive bonus - prioritize moves with high damage
-        offensive_bonus = 0
-        move_damage = node.state.player_move_stats[child.move]["damage"]
-        if move_damage > 0:
-            # Scale based on relative damage potential
-            damage_ratio = move_damage / highest_player_damage if highest_player_damage > 0 else 0
-            offensive_bonus = 0.1 * damage_ratio  # Reduced from 0.15
-            
-            # Bonus for potential killing blow - but ONLY if charge is not 1
-            if killing_blow_possible and child.move in potential_killing_moves and node.state.player_charges[child.move] > 1:
-                offensive_bonus += 0.2  # Reduced from 0.3 and only applies with sufficient charge
-        
-        # Counter-strategy bonus - scaled by threat level
-        counter_bonus = 0
-        if child.move == counter_to_strongest:
-            counter_bonus = 0.1 * threat_level  # Reduced from 0.15
-        
-        # Balance offensive and defensive strategies
-        enemy_health_ratio = node.state.enemy_health / node.state.enemy_max_health
-        player_health_ratio = node.state.player_health / node.state.player_max_health
-        
-        if enemy_health_ratio < 0.3:  # Enemy close to death
-            offensive_bonus *= 1.2   # Reduced boost (was 1.5)
-            counter_bonus *= 0.7     # Less reduction (was 0.5)
+    # MUCH STRONGER charge management penalty
+    charge_penalty = 0
+    if move in state.player_charges:
+        # Critical penalty if move would deplete charge to -1 (charge is 1)
+        if state.player_charges[move] == 1:
+            charge_penalty = 0.8  # Very severe penalty - almost always avoid
+        # Significant penalty if charge would go to 0 (charge is 2)
+        elif state.player_charges[move] == 2:
+            charge_penalty = 0.3  # Still a significant penalty
+    
+    # Offensive bonus - prioritize moves with high damage
+    offensive_bonus = 0
+    move_damage = context.player_damage[move]
+    if move_damage > 0:
+        # Scale based on relative damage potential
+        highest_player_damage = context.highest_player_damage
+        damage_ratio = move_damage / highest_player_damage if highest_player_damage > 0 else 0
+        offensive_bonus = 0.1 * damage_ratio  # Reduced from 0.15
         
-        if player_health_ratio < 0.3:  # Player in danger
-            counter_bonus *= 1.3      # Reduced boost (was 1.5)
+        # Bonus for a potential killing blow - but ONLY if charge is not 1
+        if move_damage > state.enemy_shield + state.enemy_health and state.player_charges[move] > 1:
+            offensive_bonus += 0.2  # Reduced from 0.3 and only applies with sufficient charge
+    
+    # Counter-strategy bonus - scaled by threat level
+    counter_bonus = 0
+    if move == context.counter_to_strongest:
+        counter_bonus = 0.1 * threat_level  # Reduced from 0.15
+    
+    # Balance offensive and defensive strategies
+    enemy_health_ratio = state.enemy_health / state.enemy_max_health
+    player_health_ratio = state.player_health / state.player_max_health
+    
+    if enemy_health_ratio < 0.3:  # Enemy close to death
+        offensive_bonus *= 1.2   # Reduced boost (was 1.5)
+        counter_bonus *= 0.7     # Less reduction (was 0.5)
+    
+    if player_health_ratio < 0.3:  # Player in danger
+        counter_bonus *= 1.3      # Reduced boost (was 1.5)
+    
+    return offensive_bonus, counter_bonus, charge_penalty
+
+def select_best_child(arena, node, exploration_weight=1.4):
+    """UCT plus the children's stored selection priors (see selection_prior)."""
+    best_score = -float('inf')
+    best_child = -1
+    stat, child_visits, child_wins = arena.stat, arena.visits, arena.wins
+    offensive_bonus, counter_bonus, charge_penalty = arena.offensive_bonus, arena.counter_bonus, arena.charge_penalty
+    log_parent_visits = math.log(child_visits[stat[node]])
+    
+    for child in arena.children(node):
+        visits = child_visits[stat[child]]
+        # Basic UCT formula
+        exploitation = child_wins[stat[child]] / visits if visits > 0 else 0
+        exploration = math.sqrt(log_parent_visits / visits) if visits > 0 else float('inf')
         
         # Combine all factors
-        score = exploitation + (exploration_weight * exploration) + offensive_bonus + counter_bonus - charge_penalty
+        score = (exploitation + (exploration_weight * exploration) + offensive_bonus[child] + counter_bonus[child]
+                 - charge_penalty[child])
         
         if score > best_score:
             best_score = score
@@ -272,57 +586,66 @@ def select_best_child(node, exploration_weight=1.4):
             
     return best_child
 
-def expand(node):
-    tried_moves = [child.move for child in node.children]
-    possible_moves = get_player_possible_moves(node.state)
+def expand(arena, node, state, transposition_table=None, rng=random):
+    """
+    Adds the action node for one untried move to decision node `node` (whose
+    state is `state`), samples the enemy reply and returns the new outcome node,
+    or -1 when the arena is full. `state` is advanced to the outcome in place.
+    All random choices come from `rng` (see make_rng).
+    """
+    tried_moves = [MOVES[arena.move[child]] for child in arena.children(node)]
+    possible_moves = get_player_possible_moves(state)
     untried_moves = [m for m in possible_moves if m not in tried_moves]
     
     if not untried_moves:
         untried_moves = possible_moves
     
+    context = state.context
+    player_damage = context.player_damage
+    
     # Find moves that could potentially kill the enemy WITHOUT depleting charges
     killing_moves = []
     for move in untried_moves:
-        damage = node.state.player_move_stats[move]["damage"]
+        damage = player_damage[move]
         # Only consider killing moves if they don't deplete charges to -1
-        if damage > node.state.enemy_shield + node.state.enemy_health and node.state.player_charges[move] > 1:
+        if damage > state.enemy_shield + state.enemy_health and state.player_charges[move] > 1:
             killing_moves.append(move)
     
-    # Determine strongest enemy attack
-    strongest_enemy_move, strongest_damage = get_enemy_strongest_attack(node.state.enemy_move_stats)
-    counter_to_strongest = get_counter_move(strongest_enemy_move)
+    # Strongest enemy attack and its counter are fixed by the move stats
+    strongest_damage = context.strongest_damage
+    counter_to_strongest = context.counter_to_strongest
     
     # Assess state of the game
-    enemy_health_ratio = node.state.enemy_health / node.state.enemy_max_health
-    player_health_ratio = node.state.player_health / node.state.player_max_health
+    enemy_health_ratio = state.enemy_health / state.enemy_max_health
+    player_health_ratio = state.player_health / state.player_max_health
     
     # Strongly prioritize moves with good charge status
-    high_charge_moves = [m for m in untried_moves if node.state.player_charges[m] > 1]
+    high_charge_moves = [m for m in untried_moves if state.player_charges[m] > 1]
     
     # NEVER choose moves that would deplete charge to -1 unless absolutely necessary
-    safe_moves = [m for m in untried_moves if node.state.player_charges[m] > 1]
+    safe_moves = [m for m in untried_moves if state.player_charges[m] > 1]
     if not safe_moves and untried_moves:  # Only if we have no other choice
         safe_moves = untried_moves
     
     # Decision logic with stronger charge management
     if killing_moves:
         # If we can kill the enemy WITHOUT depleting charge, do it
-        move = random.choice(killing_moves)
+        move = rng.choice(killing_moves)
     elif not high_charge_moves:
         # If we have no high charge moves, just pick randomly from what's available
         # (this should be rare but prevents problems)
-        move = random.choice(safe_moves)
+        move = rng.choice(safe_moves)
     elif enemy_health_ratio < 0.3 and high_charge_moves:
         # Enemy close to death - prioritize high damage moves with good charge
         high_damage_moves = sorted(
             high_charge_moves, 
-            key=lambda m: node.state.player_move_stats[m]["damage"], 
+            key=player_damage.__getitem__, 
             reverse=True
         )
         if high_damage_moves:
             move = high_damage_moves[0]
         else:
-            move = random.choice(high_charge_moves)
+            move = rng.choice(high_charge_moves)
     elif player_health_ratio < 0.3 and counter_to_strongest in high_charge_moves:
         # Player in danger - prioritize countering if possible with good charge
         move = counter_to_strongest
@@ -330,30 +653,54 @@ def expand(node):
         # Enemy damage is weak - focus on offensive moves with good charge
         high_damage_moves = sorted(
             high_charge_moves, 
-            key=lambda m: node.state.player_move_stats[m]["damage"], 
+            key=player_damage.__getitem__, 
             reverse=True
         )
         if high_damage_moves:
             move = high_damage_moves[0]
         else:
-            move = random.choice(high_charge_moves)
+            move = rng.choice(high_charge_moves)
     elif counter_to_strongest in high_charge_moves:
         # Default case - counter with good charge
         move = counter_to_strongest
     else:
         # Any move with good charge
-        move = random.choice(high_charge_moves)
+        move = rng.choice(high_charge_moves)
     
-    new_state = node.state.clone()
-    enemy_moves = get_enemy_possible_moves(new_state)
-    enemy_move = random.choice(enemy_moves) if enemy_moves else "rock"
-    new_state = apply_round(new_state, move, enemy_move)
-    child_node = Node(new_state, parent=node, move=move)
-    node.children.append(child_node)
-    return child_node
-
-def simulate(state):
+    action = arena.add_action(node, move, len(possible_moves))
+    if action < 0:
+        return -1
+    if transposition_table is not None:
+        arena.stat[action] = transposition_table.lookup(state, move, action)
+    arena.offensive_bonus[action], arena.counter_bonus[action], arena.charge_penalty[action] = \
+        selection_prior(state, move)
+    outcome, _ = sample_outcome(arena, action, state, rng)
+    return outcome
+
+def sample_outcome(arena, action, state, rng=random):
+    """
+    Chance step below an action node: samples a uniformly random legal enemy
+    reply (the same enemy model the rollouts use), applies the round to `state`
+    in place and returns (outcome node, whether it was just created). The node
+    is -1 when the arena is full.
+    """
+    enemy_moves = get_enemy_possible_moves(state)
+    enemy_move = rng.choice(enemy_moves) if enemy_moves else "rock"
+    outcome = arena.find_outcome(action, enemy_move)
+    created = outcome < 0
+    if created:
+        outcome = arena.add_outcome(action, enemy_move, max(len(enemy_moves), 1))
+    apply_round(state, MOVES[arena.move[action]], enemy_move)
+    return outcome, created
+
+def playout(state, rng=random):
+    """Plays one rollout from `state` with the smart/random player policy and returns the final state."""
     current_state = state.clone()
+    context = state.context
+    player_damage, player_shield = context.player_damage, context.player_shield
+    # Enemy's strongest attack is fixed by the move stats
+    strongest_damage = context.strongest_damage
+    counter_to_strongest = context.counter_to_strongest
     
     while not current_state.is_terminal():
         player_moves = get_player_possible_moves(current_state)
@@ -363,7 +710,7 @@ def simulate(state):
             break
         
         # Smart player move selection (80% of the time)
-        if random.random() < 0.8:
+        if rng.random() < 0.8:
             # Get moves with good charge status - NEVER go to -1 in simulation unless no choice
             high_charge_moves = [m for m in player_moves if current_state.player_charges[m] > 1]
             
@@ -376,20 +723,16 @@ def simulate(state):
             # Check for killing moves that don't deplete charges
             killing_moves = []
             for move in safe_moves:
-                damage = current_state.player_move_stats[move]["damage"]
+                damage = player_damage[move]
                 if damage > current_state.enemy_shield + current_state.enemy_health:
                     # Only add killing moves if they don't deplete charges to -1
                     if current_state.player_charges[move] > 1:
                         killing_moves.append(move)
             
-            # Identify enemy's strongest attack
-            strongest_enemy_move, strongest_damage = get_enemy_strongest_attack(current_state.enemy_move_stats)
-            counter_to_strongest = get_counter_move(strongest_enemy_move)
-            
             # Find highest damage moves (within safe moves)
             moves_by_damage = sorted(
                 safe_moves, 
-                key=lambda m: current_state.player_move_stats[m]["damage"],
+                key=player_damage.__getitem__,
                 reverse=True
             )
             high_damage_moves = moves_by_damage[:2] if len(moves_by_damage) >= 2 else moves_by_damage
@@ -401,11 +744,11 @@ def simulate(state):
             # Prioritize based on situation
             if killing_moves:
                 # First priority: kill the enemy if possible WITHOUT depleting charge
-                player_move = random.choice(killing_moves)
+                player_move = rng.choice(killing_moves)
                 
             elif not safe_moves:
                 # This should never happen, but just in case
-                player_move = random.choice(player_moves)
+                player_move = rng.choice(player_moves)
                 
             elif enemy_health_ratio < 0.3:
                 # Enemy nearly dead - prioritize damage
@@ -413,7 +756,7 @@ def simulate(state):
                 if good_damage_moves:
                     player_move = good_damage_moves[0]  # Highest damage move with good charge
                 else:
-                    player_move = random.choice(safe_moves)  # Any safe move
+                    player_move = rng.choice(safe_moves)  # Any safe move
                     
             elif player_health_ratio < 0.3:
                 # Player in danger - prioritize countering and defense
@@ -423,11 +766,11 @@ def simulate(state):
                     # Find move with best shield generation
                     best_shield_move = max(
                         safe_moves,
-                        key=lambda m: current_state.player_move_stats[m]["shield"]
+                        key=player_shield.__getitem__
                     )
                     player_move = best_shield_move
                 else:
-                    player_move = random.choice(player_moves)
+                    player_move = rng.choice(player_moves)
                     
             elif strongest_damage < 5:
                 # Enemy not threatening - focus on offense
@@ -438,10 +781,10 @@ def simulate(state):
                     # Prefer damage among safe moves
                     safe_by_damage = sorted(
                         safe_moves,
-                        key=lambda m: current_state.player_move_stats[m]["damage"],
+                        key=player_damage.__getitem__,
                         reverse=True
                     )
-                    player_move = safe_by_damage[0] if safe_by_damage else random.choice(player_moves)
+                    player_move = safe_by_damage[0] if safe_by_damage else rng.choice(player_moves)
                     
             else:
                 # Balanced approach
@@ -450,105 +793,434 @@ def simulate(state):
                 if counter_with_good_charge:
                     player_move = counter_to_strongest
                 elif safe_moves:
-                    player_move = random.choice(safe_moves)
+                    player_move = rng.choice(safe_moves)
                 else:
-                    player_move = random.choice(player_moves)
+                    player_move = rng.choice(player_moves)
         else:
             # Sometimes play randomly, but still prioritize charge management
             high_charge_moves = [m for m in player_moves if current_state.player_charges[m] > 1]
             if high_charge_moves:
-                player_move = random.choice(high_charge_moves)
+                player_move = rng.choice(high_charge_moves)
             else:
-                player_move = random.choice(player_moves)
+                player_move = rng.choice(player_moves)
         
         # Enemy move selection - random for now
-        enemy_move = random.choice(enemy_moves)
+        enemy_move = rng.choice(enemy_moves)
         current_state = apply_round(current_state, player_move, enemy_move)
-    
+    return current_state
+
+def simulate(state, rng=random):
+    """Plays one rollout from `state` (see playout); 1 if the player wins."""
+    final_state = playout(state, rng)
     # Win if enemy is defeated while player remains alive
-    if current_state.enemy_health <= 0 and current_state.player_health > 0:
+    if final_state.enemy_health <= 0 and final_state.player_health > 0:
         return 1
     return 0
 
-def backpropagate(node, result):
-    while node is not None:
-        node.visits += 1
-        node.wins += result
-        node = node.parent
+def backpropagate(arena, node, result):
+    parent, stat, visits, wins = arena.parent, arena.stat, arena.visits, arena.wins
+    while node >= 0:
+        i = stat[node]
+        visits[i] += 1
+        wins[i] += result
+        node = parent[node]
+
+def is_killing_move(state, move):
+    """A move that kills the enemy this round without depleting its charges (build_result's override)."""
+    return (state.player_move_stats[move]["damage"] > state.enemy_shield + state.enemy_health
+            and state.player_charges[move] > 1)
+
+def check_early_stop(children, root_visits, root_state, remaining):
+    """
+    Returns a stop reason once the root decision is settled, otherwise None.
+
+    Moves are ranked with build_result()'s rule: the best killing move (see
+    is_killing_move) by raw win rate once one is above 0.5, otherwise win rate
+    plus the constant final_score_adjustment(). "single_move": only one legal
+    move. "unreachable": even if every remaining iteration went to a trailing
+    move and none to the leader, the pick would not change. "confident": the
+    same holds for the moves' confidence bounds. `children` are the root's
+    ChildStats and root_visits its visit count.
+    """
+    possible_moves = get_player_possible_moves(root_state)
+    children = [child for child in children if child.visits > 0]
+    if len(possible_moves) == 1 and children:
+        return "single_move"
+    if len(children) < len(possible_moves) or len(children) < 2:
+        return None
+
+    adjustments = {}
+    for child in children:
+        strategy_bonus, charge_penalty = final_score_adjustment(root_state, child.move)
+        adjustments[child.move] = strategy_bonus - charge_penalty
+    killing = [child for child in children if is_killing_move(root_state, child.move)]
+
+    def settled(low, high):
+        """Whether the pick survives every child moving to its (low, high) win rate bound."""
+        viable = [c for c in killing if c.wins / c.visits > 0.5]
+        if viable:
+            leader = max(viable, key=lambda c: c.wins / c.visits)
+            return low(leader) > 0.5 and all(high(c) < low(leader) for c in killing if c is not leader)
+        if any(high(c) > 0.5 for c in killing):
+            return False
+        leader = max(children, key=lambda c: c.wins / c.visits + adjustments[c.move])
+        leader_low = low(leader) + adjustments[leader.move]
+        return all(high(c) + adjustments[c.move] < leader_low for c in children if c is not leader)
+
+    # With nothing left to spend the test is trivially true; that is budget exhaustion, not an early stop
+    if remaining > 0 and settled(lambda c: c.wins / (c.visits + remaining),
+                                 lambda c: (c.wins + remaining) / (c.visits + remaining)):
+        return "unreachable"
+
+    log_total = math.log(max(root_visits, 2))
+
+    def radius(child):
+        return math.sqrt(2 * log_total / child.visits)
+
+    if settled(lambda c: c.wins / c.visits - radius(c), lambda c: c.wins / c.visits + radius(c)):
+        return "confident"
+    return None
+
+# --- Search Profiling ---
+@dataclass
+class SearchProfile:
+    """
+    Per-phase counters of one search, filled by run_iterations(profile=...).
+    Times are wall-clock milliseconds. depth counts player decisions from the
+    root to the evaluated leaf; rollout_rounds only covers single simulate()
+    playouts (batched rollouts report just their playout count). allocations
+    counts NodeArena child-block reservations.
+    """
+    iterations: int = 0
+    selection_ms: float = 0.0
+    expansion_ms: float = 0.0
+    rollout_ms: float = 0.0
+    backprop_ms: float = 0.0
+    selection_steps: int = 0
+    expansions: int = 0
+    rollouts: int = 0
+    rollout_rounds: int = 0
+    total_depth: int = 0
+    max_depth: int = 0
+    node_count: int = 0
+    allocations: int = 0
 
-def mcts(root_state, iterations=100000):
-    root_node = Node(root_state)
+    @property
+    def avg_rollout_length(self) -> float:
+        return self.rollout_rounds / self.rollouts if self.rollouts and self.rollout_rounds else 0.0
+
+    @property
+    def avg_depth(self) -> float:
+        return self.total_depth / self.iterations if self.iterations else 0.0
+
+    def merge(self, other):
+        """Adds another search's counters to this one (root-parallel workers)."""
+        for name in ("iterations", "selection_ms", "expansion_ms", "rollout_ms", "backprop_ms",
+                     "selection_steps", "expansions", "rollouts", "rollout_rounds", "total_depth",
+                     "node_count", "allocations"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.max_depth = max(self.max_depth, other.max_depth)
+        return self
+
+    def format(self):
+        total_ms = self.selection_ms + self.expansion_ms + self.rollout_ms + self.backprop_ms
+        lines = ["\nSearch Profile:"]
+        for phase, ms, calls in (("selection", self.selection_ms, self.selection_steps),
+                                 ("expansion", self.expansion_ms, self.expansions),
+                                 ("rollout", self.rollout_ms, self.rollouts),
+                                 ("backprop", self.backprop_ms, self.iterations)):
+            share = ms / total_ms * 100 if total_ms > 0 else 0.0
+            lines.append(f"  {phase:<10} {ms:8.1f}ms ({share:4.1f}%)  calls: {calls}")
+        lines.append(f"  rollout length: {self.avg_rollout_length:.2f} rounds, depth: avg {self.avg_depth:.2f} "
+                     f"max {self.max_depth}, nodes: {self.node_count}, allocations: {self.allocations}")
+        return "\n".join(lines)
+
+# --- Search Progress ---
+@dataclass
+class ProgressHook:
+    """
+    Calls callback(snapshot) during a search every `every_iterations` iterations
+    and/or every `every_ms` milliseconds (whichever is set and due first). The
+    snapshot is a SearchResult built from the current root statistics with
+    stop_reason "running"; if the callback returns True the search stops there
+    and answers with that leader (stop_reason "accepted").
+    """
+    callback: Callable[["SearchResult"], Optional[bool]]
+    every_iterations: int = 1000
+    every_ms: Optional[float] = None
+    _last_report: float = field(default=0.0, init=False, repr=False)
+
+    def start(self):
+        self._last_report = time.perf_counter()
+
+    def due(self, completed):
+        if self.every_iterations and completed % self.every_iterations == 0:
+            return True
+        return self.every_ms is not None and (time.perf_counter() - self._last_report) * 1000.0 >= self.every_ms
+
+    def report(self, snapshot):
+        self._last_report = time.perf_counter()
+        return bool(self.callback(snapshot))
+
+def accept_stable_leader(snapshots=3, forward=None):
+    """
+    Progress callback that accepts the answer once the same move has led
+    `snapshots` consecutive snapshots. Every snapshot is passed on to `forward`
+    (e.g. a UI reporter) first.
+    """
+    history = []
+
+    def callback(snapshot):
+        if forward is not None:
+            forward(snapshot)
+        history.append(snapshot.move)
+        return len(history) >= snapshots and len(set(history[-snapshots:])) == 1
+    return callback
+
+def run_iterations(arena, root_state, iterations, rollout_batch=0, transposition_table=None,
+                   deadline=None, early_stop=False, verbose=True, rng=random, profile=None, progress=None):
+    """
+    Runs MCTS iterations on the tree in `arena`, whose root has state root_state.
+    Stops early once time.perf_counter() passes `deadline` (if given), with
+    early_stop once check_early_stop() reports the decision is settled, or when
+    the arena runs out of node slots. Returns (iterations completed, stop reason).
+    Every random draw comes from `rng`; batched rollouts get a NumPy generator
+    seeded from it. A rollout_batch below batch_rollout.MIN_BATCH is played as
+    that many scalar simulate() rollouts, which is cheaper than the kernel there.
+
+    Passing a SearchProfile accumulates per-phase timings and tree counters into
+    it. Without one the loop only pays a few `is not None` checks per iteration.
+    A ProgressHook receives snapshots of the root statistics while searching
+    and may accept the current leader early (stop reason "accepted").
+    """
+    numpy_batch = False
+    if rollout_batch:
+        from batch_rollout import simulate_batch, MIN_BATCH
+        import numpy as np
+        numpy_batch = rollout_batch >= MIN_BATCH
+        if numpy_batch:
+            batch_rng = np.random.default_rng(rng.getrandbits(64))
+    root = arena.root
+    completed = 0
+    stop_reason = "iterations"
+    if profile is not None:
+        clock = time.perf_counter
+        allocations = arena.allocations
+    if progress is not None:
+        search_started = time.perf_counter()
+        progress.start()
     for i in range(iterations):
-        node = root_node
+        if profile is not None:
+            phase_start = clock()
+        node = root
         state = root_state.clone()
+        created = False
         
-        # Selection: traverse down while node is fully expanded and non-terminal
-        while node.is_fully_expanded() and not state.is_terminal():
-            node = select_best_child(node)
-            enemy_moves = get_enemy_possible_moves(state)
-            enemy_move = random.choice(enemy_moves) if enemy_moves else "rock"
-            state = apply_round(state, node.move, enemy_move)
+        # Selection: traverse down while node is fully expanded and non-terminal.
+        # Each step picks an action by UCT and samples the enemy reply at its
+        # chance node; a reply seen for the first time ends the descent there.
+        while is_fully_expanded(arena, node, state) and not state.is_terminal():
+            action = select_best_child(arena, node)
+            if action < 0:
+                break
+            node, created = sample_outcome(arena, action, state, rng)
+            if profile is not None:
+                profile.selection_steps += 1
+            if node < 0 or created:
+                break
+        if profile is not None:
+            now = clock()
+            profile.selection_ms += (now - phase_start) * 1000.0
+            phase_start = now
         
         # Expansion: if not terminal, expand the node
-        if not state.is_terminal():
-            node = expand(node)
-            state = node.state
+        if node >= 0 and not created and not state.is_terminal():
+            node = expand(arena, node, state, transposition_table, rng)
+            if profile is not None:
+                profile.expansions += 1
+        if node < 0:
+            stop_reason = "capacity"
+            break
+        if profile is not None:
+            now = clock()
+            profile.expansion_ms += (now - phase_start) * 1000.0
+            phase_start = now
         
         # Simulation
-        result = simulate(state)
+        if numpy_batch:
+            result = simulate_batch(state, rollout_batch, batch_rng)
+        elif rollout_batch:
+            result = sum(simulate(state, rng) for _ in range(rollout_batch)) / rollout_batch
+        elif profile is not None:
+            final_state = playout(state, rng)
+            result = 1 if final_state.enemy_health <= 0 and final_state.player_health > 0 else 0
+            profile.rollout_rounds += final_state.round_number - state.round_number
+        else:
+            result = simulate(state, rng)
+        if profile is not None:
+            now = clock()
+            profile.rollout_ms += (now - phase_start) * 1000.0
+            profile.rollouts += rollout_batch or 1
+            phase_start = now
         
         # Backpropagation
-        backpropagate(node, result)
+        backpropagate(arena, node, result)
+        completed += 1
+        if profile is not None:
+            profile.backprop_ms += (clock() - phase_start) * 1000.0
+            # Action and outcome nodes alternate, so two tree levels per decision
+            depth = 0
+            parent = arena.parent
+            while node != root:
+                node = parent[node]
+                depth += 1
+            depth //= 2
+            profile.total_depth += depth
+            if depth > profile.max_depth:
+                profile.max_depth = depth
         
         # Print progress occasionally
-        if iterations > 10000 and i % 10000 == 0:
+        if verbose and iterations > 10000 and i % 10000 == 0:
             print(f"MCTS Progress: {i}/{iterations} iterations ({i/iterations*100:.1f}%)")
-    
-    # Debug: print win rates for each child of the root
-    print("\nMove Analysis:")
-    
-    # First identify strongest enemy attack for reference
-    strongest_enemy_move, strongest_damage = get_enemy_strongest_attack(root_state.enemy_move_stats)
-    counter_to_strongest = get_counter_move(strongest_enemy_move)
-    print(f"Enemy's strongest attack: {strongest_enemy_move} (DMG: {strongest_damage})")
-    print(f"Counter to strongest: {counter_to_strongest}")
-    
-    for child in root_node.children:
-        if child.visits > 0:
-            win_rate = child.wins / child.visits
-            charge_status = root_state.player_charges[child.move]
-            is_counter = child.move == counter_to_strongest
-            
-            print(f"Move: {child.move}  Win rate: {win_rate:.3f}  Visits: {child.visits}  "
-                  f"Charge: {charge_status}  " + ("(COUNTER)" if is_counter else ""))
-    
-    if not root_node.children:
-        # This shouldn't happen in a real game, but just in case
-        return "rock"
-    
-    # Consider both win rate and other strategic factors for final selection
-    best_child = None
-    best_score = -float('inf')
-    
-    # Check for potential killing moves
-    killing_moves = []
-    for child in root_node.children:
-        if child.visits == 0:
-            continue
-            
-        damage = root_state.player_move_stats[child.move]["damage"]
-        # Only consider killing moves that don't deplete charges to -1
-        if damage > root_state.enemy_shield + root_state.enemy_health and root_state.player_charges[child.move] > 1:
-            killing_moves.append(child)
-    
-    # If we have killing moves with decent win rates, prioritize them
-    if killing_moves:
-        viable_killing_moves = [child for child in killing_moves if child.visits > 0 and (child.wins/child.visits) > 0.5]
-        if viable_killing_moves:
-            best_child = max(viable_killing_moves, key=lambda c: c.wins/c.visits if c.visits > 0 else 0)
-            print(f"Selecting killing move: {best_child.move} with win rate: {best_child.wins/best_child.visits:.3f}")
-            return best_child.move
-    
+        
+        if progress is not None and progress.due(completed):
+            snapshot = build_result(root_children(arena, root), root_state, completed,
+                                    (time.perf_counter() - search_started) * 1000.0, "running")
+            if progress.report(snapshot):
+                stop_reason = "accepted"
+                break
+        
+        # Anytime search: stop at the deadline with whatever the tree has learned
+        if deadline is not None and time.perf_counter() >= deadline:
+            stop_reason = "deadline"
+            break
+        
+        if early_stop and completed < iterations and (completed == 1 or (completed >= EARLY_STOP_MIN_ITERATIONS and
+                                              completed % EARLY_STOP_CHECK_INTERVAL == 0)):
+            reason = check_early_stop(root_children(arena, root), arena.node_visits(root), root_state,
+                                      iterations - completed)
+            if reason:
+                stop_reason = reason
+                break
+    if profile is not None:
+        profile.iterations += completed
+        profile.node_count = len(arena)
+        profile.allocations += arena.allocations - allocations
+    return completed, stop_reason
+
+def make_deadline(time_budget_ms):
+    """Absolute perf_counter() deadline for a budget in milliseconds (None = no deadline)."""
+    if time_budget_ms is None:
+        return None
+    return time.perf_counter() + time_budget_ms / 1000.0
+
+def record_search_info(search_info, result):
+    """Fills the optional search_info dict with the iterations run, elapsed time and stop reason."""
+    if search_info is not None:
+        search_info["iterations"] = result.iterations
+        search_info["elapsed_ms"] = result.elapsed_ms
+        search_info["stop_reason"] = result.stop_reason
+        if result.profile is not None:
+            search_info["profile"] = result.profile
+
+def mcts_search(root_state, iterations=100000, rollout_batch=0, transposition_table=None,
+                time_budget_ms=None, early_stop=False, verbose=False, seed=None, profile=False, progress=None,
+                arena_capacity=ARENA_CAPACITY):
+    """
+    Runs UCT search from root_state and returns a SearchResult. With rollout_batch > 0
+    each leaf is scored by the win fraction over rollout_batch playouts (the NumPy
+    batch kernel from batch_rollout.MIN_BATCH up) instead of a single simulate() playout.
+
+    Passing a TranspositionTable makes nodes that play the same move from the same
+    state share their visit and win statistics.
+
+    With time_budget_ms the search stops at the deadline (iterations is then only
+    an upper bound) and returns the best move found so far. early_stop ends the
+    search as soon as the root decision is settled (see check_early_stop).
+    Nothing is printed unless verbose is set (progress lines only). A seed makes
+    the run reproducible (see make_rng). profile=True attaches a SearchProfile
+    with per-phase timings to the result. A ProgressHook streams snapshots of the
+    root statistics while searching.
+
+    The tree lives in a NodeArena sized by tree_capacity(iterations, arena_capacity).
+    """
+    started = time.perf_counter()
+    arena = NodeArena(tree_capacity(iterations, arena_capacity))
+    search_profile = SearchProfile() if profile else None
+    completed, stop_reason = run_iterations(arena, root_state, iterations, rollout_batch,
+                                            transposition_table, deadline=make_deadline(time_budget_ms),
+                                            early_stop=early_stop, verbose=verbose, rng=make_rng(seed),
+                                            profile=search_profile, progress=progress)
+    result = build_result(root_children(arena, arena.root), root_state, completed,
+                          (time.perf_counter() - started) * 1000.0, stop_reason)
+    result.profile = search_profile
+    return result
+
+def mcts(root_state, iterations=100000, rollout_batch=0, return_win_rates=False,
+         transposition_table=None, time_budget_ms=None, search_info=None, early_stop=False, seed=None,
+         profile=False):
+    """
+    Printing wrapper around mcts_search(): logs progress and the move analysis and
+    returns the chosen move, or (move, {move: win_rate}) with return_win_rates.
+    If a dict is passed as search_info it receives the iterations completed, the
+    elapsed milliseconds and the stop reason (plus the SearchProfile with profile=True).
+    """
+    result = mcts_search(root_state, iterations, rollout_batch, transposition_table,
+                         time_budget_ms=time_budget_ms, early_stop=early_stop, verbose=True, seed=seed,
+                         profile=profile)
+    record_search_info(search_info, result)
+    print(format_result(result))
+    return (result.move, result.win_rates) if return_win_rates else result.move
+
+# --- Search Results ---
+@dataclass
+class MoveScore:
+    """Root statistics and final scoring of one player move"""
+    move: str
+    visits: int
+    wins: float
+    win_rate: float
+    charge: int
+    strategy_bonus: float = 0.0
+    charge_penalty: float = 0.0
+    final_score: float = 0.0
+    is_counter: bool = False
+
+@dataclass
+class SearchResult:
+    """Outcome of one search: the chosen move plus everything the analysis printout shows"""
+    move: str
+    moves: List[MoveScore] = field(default_factory=list)
+    iterations: int = 0
+    elapsed_ms: float = 0.0
+    stop_reason: str = "iterations"
+    engine: str = "mcts"
+    selection: str = "score"  # "score", "killing", "exact" or "fallback"
+    strongest_enemy_move: Optional[str] = None
+    strongest_damage: int = 0
+    counter_move: Optional[str] = None
+    profile: Optional[SearchProfile] = None
+
+    @property
+    def win_rates(self) -> Dict[str, float]:
+        return {score.move: score.win_rate for score in self.moves}
+
+    def summary(self) -> Dict:
+        """JSON-friendly leader, budget and per-move visits/win rates (progress events, APIs)."""
+        return {
+            "leader": self.move,
+            "iterations": self.iterations,
+            "elapsedMs": round(self.elapsed_ms, 1),
+            "stopReason": self.stop_reason,
+            "moves": {score.move: {"visits": score.visits, "winRate": round(score.win_rate, 4)}
+                      for score in self.moves},
+        }
+
+def final_score_adjustment(root_state, move):
+    """
+    Returns (strategy_bonus, charge_penalty) that build_result() adds to a root
+    move's win rate. Depends only on the root state, so it is constant per search.
+    """
     # Assess game state
     enemy_health_ratio = root_state.enemy_health / root_state.enemy_max_health
     player_health_ratio = root_state.player_health / root_state.player_max_health
@@ -562,79 +1234,141 @@ def mcts(root_state, iterations=100000):
     if strongest_damage < 5:
         threat_level *= 0.5  # Reduce threat for weak attacks
     
-    for child in root_node.children:
-        if child.visits == 0:
-            continue
-            
-        win_rate = child.wins / child.visits
-        
-        # Apply MUCH STRONGER charge penalty
-        charge_penalty = 0
-        if child.move in root_state.player_charges:
-            if root_state.player_charges[child.move] == 1:
-                charge_penalty = 0.5  # Very high penalty for final decision
-            elif root_state.player_charges[child.move] == 2:
-                charge_penalty = 0.15  # Moderate penalty
-        
-        # Apply strategy bonuses based on game state
-        strategy_bonus = 0
-        
-        # Offensive bonus for high damage moves
-        move_damage = root_state.player_move_stats[child.move]["damage"]
-        highest_damage = max(stats["damage"] for move, stats in root_state.player_move_stats.items())
-        if move_damage > 0 and highest_damage > 0:
-            damage_ratio = move_damage / highest_damage
-            
-            # Scale offensive bonus based on enemy health
-            if enemy_health_ratio < 0.3:
-                strategy_bonus += 0.1 * damage_ratio  # Reduced from 0.15
-            else:
-                strategy_bonus += 0.05 * damage_ratio  # Reduced from 0.08
-        
-        # Counter bonus scaled by threat level
-        if child.move == counter_to_strongest:
-            if player_health_ratio < 0.3:
-                strategy_bonus += 0.08 * threat_level  # Reduced from 0.1
-            else:
-                strategy_bonus += 0.04 * threat_level  # Reduced from 0.05
+    # Apply MUCH STRONGER charge penalty
+    charge_penalty = 0
+    if move in root_state.player_charges:
+        if root_state.player_charges[move] == 1:
+            charge_penalty = 0.5  # Very high penalty for final decision
+        elif root_state.player_charges[move] == 2:
+            charge_penalty = 0.15  # Moderate penalty
+    
+    # Apply strategy bonuses based on game state
+    strategy_bonus = 0
+    
+    # Offensive bonus for high damage moves
+    move_damage = root_state.player_move_stats[move]["damage"]
+    highest_damage = max(stats["damage"] for _, stats in root_state.player_move_stats.items())
+    if move_damage > 0 and highest_damage > 0:
+        damage_ratio = move_damage / highest_damage
         
-        # Shield bonus when player is weak
+        # Scale offensive bonus based on enemy health
+        if enemy_health_ratio < 0.3:
+            strategy_bonus += 0.1 * damage_ratio  # Reduced from 0.15
+        else:
+            strategy_bonus += 0.05 * damage_ratio  # Reduced from 0.08
+    
+    # Counter bonus scaled by threat level
+    if move == counter_to_strongest:
         if player_health_ratio < 0.3:
-            shield_value = root_state.player_move_stats[child.move]["shield"]
-            max_shield = max(stats["shield"] for _, stats in root_state.player_move_stats.items())
-            if max_shield > 0:
-                shield_ratio = shield_value / max_shield
-                strategy_bonus += 0.06 * shield_ratio  # Reduced from 0.08
-        
-        # Final score combines win rate with our priorities
-        score = win_rate + strategy_bonus - charge_penalty
-        
-        # Log detailed scoring for transparency
-        print(f"Move: {child.move}, Win Rate: {win_rate:.3f}, Charge: {root_state.player_charges[child.move]}, " 
-              f"Strategy Bonus: {strategy_bonus:.3f}, Charge Penalty: {charge_penalty:.3f}, " 
-              f"Final Score: {score:.3f}")
-        
-        if score > best_score:
-            best_score = score
-            best_child = child
+            strategy_bonus += 0.08 * threat_level  # Reduced from 0.1
+        else:
+            strategy_bonus += 0.04 * threat_level  # Reduced from 0.05
+    
+    # Shield bonus when player is weak
+    if player_health_ratio < 0.3:
+        shield_value = root_state.player_move_stats[move]["shield"]
+        max_shield = max(stats["shield"] for _, stats in root_state.player_move_stats.items())
+        if max_shield > 0:
+            shield_ratio = shield_value / max_shield
+            strategy_bonus += 0.06 * shield_ratio  # Reduced from 0.08
     
-    if best_child:
-        return best_child.move
+    return strategy_bonus, charge_penalty
+
+
+def build_result(children, root_state, iterations=0, elapsed_ms=0.0, stop_reason="iterations", engine="mcts"):
+    """Picks the final move from the root children's ChildStats and strategy bonuses."""
+    strongest_enemy_move, strongest_damage = get_enemy_strongest_attack(root_state.enemy_move_stats)
+    counter_to_strongest = get_counter_move(strongest_enemy_move)
+    result = SearchResult(move="rock", iterations=iterations, elapsed_ms=elapsed_ms, stop_reason=stop_reason,
+                          engine=engine, strongest_enemy_move=strongest_enemy_move,
+                          strongest_damage=strongest_damage, counter_move=counter_to_strongest)
+
+    # Score every visited root move: win rate plus our strategic priorities
+    for child in children:
+        if child.visits == 0:
+            continue
+        win_rate = child.wins / child.visits
+        strategy_bonus, charge_penalty = final_score_adjustment(root_state, child.move)
+        result.moves.append(MoveScore(
+            move=child.move,
+            visits=child.visits,
+            wins=child.wins,
+            win_rate=win_rate,
+            charge=root_state.player_charges[child.move],
+            strategy_bonus=strategy_bonus,
+            charge_penalty=charge_penalty,
+            final_score=win_rate + strategy_bonus - charge_penalty,
+            is_counter=child.move == counter_to_strongest,
+        ))
+
+    if not children:
+        # This shouldn't happen in a real game, but just in case
+        result.selection = "fallback"
+        return result
+
+    # Check for potential killing moves - only those that don't deplete charges to -1
+    killing_moves = [score for score in result.moves if is_killing_move(root_state, score.move)]
+
+    # If we have killing moves with decent win rates, prioritize them
+    viable_killing_moves = [score for score in killing_moves if score.win_rate > 0.5]
+    if viable_killing_moves:
+        result.move = max(viable_killing_moves, key=lambda s: s.win_rate).move
+        result.selection = "killing"
+        return result
+
+    best_score = -float('inf')
+    best_move = None
+    for score in result.moves:
+        if score.final_score > best_score:
+            best_score = score.final_score
+            best_move = score.move
+
+    if best_move:
+        result.move = best_move
     else:
         # Fallback if no child has visits
-        return max(root_node.children, key=lambda n: n.wins / n.visits if n.visits > 0 else 0).move
+        result.move = max(children, key=lambda n: n.wins / n.visits if n.visits > 0 else 0).move
+        result.selection = "fallback"
+    return result
 
-def get_best_action(api_data, iterations=100000):
-    """
-    Expects api_data to contain:
-      - "player_move_stats"
-      - "enemy_move_stats"
-      - "initial_state": dict with player_health, player_shield, enemy_health, enemy_shield, 
-                           player_max_health, player_max_shield, enemy_max_health, enemy_max_shield, and optionally round_number.
-      - "player_charges"
-      - "enemy_charges"
-    Returns the best move determined by MCTS.
-    """
+# Engines whose results carry only win probabilities (no tree statistics)
+LOOKUP_HEADERS = {
+    "exact": "\nExact Move Analysis:",
+    "book": "\nOpening Book Move Analysis:",
+    "cache": "\nCached Move Analysis:",
+}
+
+def format_result(result):
+    """Renders a SearchResult as the move analysis text the CLI prints."""
+    if result.engine in LOOKUP_HEADERS:
+        lines = [LOOKUP_HEADERS[result.engine]]
+        for score in result.moves:
+            lines.append(f"Move: {score.move}  Win probability: {score.win_rate:.4f}")
+        return "\n".join(lines)
+
+    lines = [
+        "\nMove Analysis:",
+        f"Enemy's strongest attack: {result.strongest_enemy_move} (DMG: {result.strongest_damage})",
+        f"Counter to strongest: {result.counter_move}",
+    ]
+    for score in result.moves:
+        lines.append(f"Move: {score.move}  Win rate: {score.win_rate:.3f}  Visits: {score.visits}  "
+                     f"Charge: {score.charge}  " + ("(COUNTER)" if score.is_counter else ""))
+
+    if result.selection == "killing":
+        lines.append(f"Selecting killing move: {result.move} with win rate: {result.win_rates[result.move]:.3f}")
+    else:
+        for score in result.moves:
+            lines.append(f"Move: {score.move}, Win Rate: {score.win_rate:.3f}, Charge: {score.charge}, "
+                         f"Strategy Bonus: {score.strategy_bonus:.3f}, Charge Penalty: {score.charge_penalty:.3f}, "
+                         f"Final Score: {score.final_score:.3f}")
+    lines.append(f"Search: {result.iterations} iterations in {result.elapsed_ms:.0f}ms ({result.stop_reason})")
+    if result.profile is not None:
+        lines.append(result.profile.format())
+    return "\n".join(lines)
+
+def build_state(api_data):
+    """Builds the root GameState from api_data (see get_best_action for the expected keys)."""
     state_data = api_data["initial_state"]
     state = GameState(
         player_health=state_data["player_health"],
@@ -651,30 +1385,358 @@ def get_best_action(api_data, iterations=100000):
     )
     
     if "player_charges" in api_data:
-        state.player_charges = api_data["player_charges"]
+        state.player_charges = dict(api_data["player_charges"])
     if "enemy_charges" in api_data:
-        state.enemy_charges = api_data["enemy_charges"]
+        state.enemy_charges = dict(api_data["enemy_charges"])
+    return state
 
-    # Display initial state information
-    print("\nInitial State Analysis:")
-    print(f"Player Health: {state.player_health}/{state.player_max_health}, Shield: {state.player_shield}/{state.player_max_shield}")
-    print(f"Enemy Health: {state.enemy_health}/{state.enemy_max_health}, Shield: {state.enemy_shield}/{state.enemy_max_shield}")
-    
-    print("\nPlayer Charges:")
+
+def format_state_analysis(state):
+    """Renders the initial state, charge and enemy move analysis shown before a search."""
+    lines = [
+        "\nInitial State Analysis:",
+        f"Player Health: {state.player_health}/{state.player_max_health}, Shield: {state.player_shield}/{state.player_max_shield}",
+        f"Enemy Health: {state.enemy_health}/{state.enemy_max_health}, Shield: {state.enemy_shield}/{state.enemy_max_shield}",
+        "\nPlayer Charges:",
+    ]
     for move, charge in state.player_charges.items():
         status = "CRITICAL" if charge == 1 else "LOW" if charge == 2 else "GOOD"
-        print(f"  {move}: {charge}/3 ({status})")
-    
-    print("\nEnemy Move Analysis:")
+        lines.append(f"  {move}: {charge}/3 ({status})")
+
+    lines.append("\nEnemy Move Analysis:")
     for move, stats in state.enemy_move_stats.items():
-        print(f"  {move}: DMG={stats['damage']}, SHIELD={stats['shield']}")
-    
+        lines.append(f"  {move}: DMG={stats['damage']}, SHIELD={stats['shield']}")
+
     strongest_move, strongest_dmg = get_enemy_strongest_attack(state.enemy_move_stats)
-    print(f"  Strongest enemy attack: {strongest_move} (DMG: {strongest_dmg})")
-    print(f"  Counter strategy: Use {get_counter_move(strongest_move)}")
+    lines.append(f"  Strongest enemy attack: {strongest_move} (DMG: {strongest_dmg})")
+    lines.append(f"  Counter strategy: Use {get_counter_move(strongest_move)}")
+    return "\n".join(lines)
+
+def print_state_analysis(state):
+    """Prints format_state_analysis(state)."""
+    print(format_state_analysis(state))
+
+def search_state(state, iterations=100000, rollout_batch=0, engine="mcts", exact_max_states=None,
+                 tt_max_entries=0, workers=1, time_budget_ms=None, early_stop=False, verbose=False,
+                 seed=None, profile=False, use_book=False, cache=None, progress=None, arena_capacity=ARENA_CAPACITY):
+    """
+    Quiet search entry point: returns a SearchResult for `state` without printing
+    anything (verbose only enables the MCTS progress lines). See get_best_action
+    for the meaning of the options; arena_capacity caps the MCTS tree size (None
+    sizes it from iterations alone, see tree_capacity).
+    """
+    if use_book:
+        from opening_book import get_default_book
+        book = get_default_book()
+        result = book.lookup(state) if book is not None else None
+        if result is not None:
+            return result
+
+    # Seeded and profiled runs always search, so they stay reproducible/measurable
+    use_cache = cache is not None and seed is None and not profile
+    cache_settings = dict(engine=engine, rollout_batch=rollout_batch, early_stop=early_stop,
+                          tt_max_entries=tt_max_entries)
+    if use_cache:
+        result = cache.get(state, iterations, **cache_settings)
+        if result is not None:
+            return result
+
+    result = _run_engine(state, iterations, rollout_batch, engine, exact_max_states, tt_max_entries, workers,
+                         time_budget_ms, early_stop, verbose, seed, profile, progress, arena_capacity)
+    if use_cache:
+        cache.put(state, result, iterations, **cache_settings)
+    return result
+
+def _run_engine(state, iterations, rollout_batch, engine, exact_max_states, tt_max_entries, workers,
+                time_budget_ms, early_stop, verbose, seed, profile, progress, arena_capacity=ARENA_CAPACITY):
+    """The uncached search behind search_state(). progress is only reported by single-process MCTS."""
+    if engine == "exact":
+        from exact_solver import solve_exact, ExactTableOverflow, EXACT_MAX_STATES
+        started = time.perf_counter()
+        try:
+            best_move, win_rates = solve_exact(state, max_states=exact_max_states or EXACT_MAX_STATES)
+        except ExactTableOverflow as e:
+            if verbose:
+                print(f"\nExact solver gave up ({e}), falling back to MCTS")
+        else:
+            if best_move is not None:
+                moves = [MoveScore(move=move, visits=0, wins=0.0, win_rate=win_rate,
+                                   charge=state.player_charges[move], final_score=win_rate)
+                         for move, win_rate in win_rates.items()]
+                return SearchResult(move=best_move, moves=moves, elapsed_ms=(time.perf_counter() - started) * 1000.0,
+                                    stop_reason="solved", engine="exact", selection="exact")
+    elif engine != "mcts":
+        raise ValueError(f"Unknown engine: {engine}")
+
+    if workers > 1:
+        from mcts_parallel import parallel_search
+        return parallel_search(state, iterations, workers, rollout_batch=rollout_batch,
+                               tt_max_entries=tt_max_entries, seed=seed, time_budget_ms=time_budget_ms,
+                               early_stop=early_stop, profile=profile, arena_capacity=arena_capacity)
+
+    transposition_table = TranspositionTable(tt_max_entries) if tt_max_entries > 0 else None
+    return mcts_search(state, iterations, rollout_batch=rollout_batch, transposition_table=transposition_table,
+                       time_budget_ms=time_budget_ms, early_stop=early_stop, verbose=verbose, seed=seed,
+                       profile=profile, progress=progress, arena_capacity=arena_capacity)
+
+def analyze_position(api_data, iterations=100000, **options):
+    """Builds the state from api_data (see get_best_action) and returns a quiet search_state() result."""
+    return search_state(build_state(api_data), iterations, **options)
+
+def get_best_action(api_data, iterations=100000, rollout_batch=0, engine="mcts",
+                    exact_max_states=None, return_win_rates=False, tt_max_entries=0, workers=1,
+                    time_budget_ms=None, search_info=None, early_stop=False, verbose=True, seed=None,
+                    profile=False, use_book=False, cache=None, progress=None):
+    """
+    Expects api_data to contain:
+      - "player_move_stats"
+      - "enemy_move_stats"
+      - "initial_state": dict with player_health, player_shield, enemy_health, enemy_shield,
+                           player_max_health, player_max_shield, enemy_max_health, enemy_max_shield, and optionally round_number.
+      - "player_charges"
+      - "enemy_charges"
+    Returns the best move determined by MCTS. rollout_batch > 0 scores each leaf with
+    that many rollouts, batched in NumPy from batch_rollout.MIN_BATCH up (see
+    batch_rollout.simulate_batch). Each iteration then costs rollout_batch rollouts,
+    so it only pays off when noisy leaf values matter more than tree iterations.
+
+    engine="exact" solves the fight exactly (see exact_solver.solve_exact) and falls
+    back to MCTS when more than exact_max_states states would be needed. With
+    return_win_rates the result is (move, {move: win_rate}) for either engine.
+    tt_max_entries > 0 enables a transposition table of that size for MCTS.
+    workers > 1 splits the iterations across a warm process pool (see mcts_parallel).
+
+    time_budget_ms turns MCTS into an anytime search: it runs until the deadline
+    (with iterations as an upper bound) and returns the best move found so far.
+    A dict passed as search_info receives the iterations completed, elapsed_ms and
+    the stop_reason. early_stop halts MCTS once the leading move is settled.
+
+    verbose=False skips all printing; use analyze_position() to get the full
+    SearchResult instead of just the move. The same seed on the same state gives
+    the same result (with workers > 1 each worker gets its own stream derived
+    from it); without one the shared `random` stream is used.
+
+    profile=True records per-phase MCTS timings and tree counters (a
+    SearchProfile) into search_info["profile"] and the printed analysis.
+
+    With use_book the precomputed opening book (see opening_book) is consulted
+    first; a hit returns its move without searching (stop_reason "book").
+    Passing a decision_cache.DecisionCache reuses an earlier decision for the
+    same state searched with at least `iterations` (stop_reason "cached") and
+    stores new ones; seeded and profiled calls bypass it.
+
+    progress (a ProgressHook) receives intermediate snapshots (current leader,
+    per-move win rates and visits) while single-process MCTS runs, and can end
+    the search early by returning True (see accept_stable_leader).
+    """
+    state = build_state(api_data)
+    if verbose:
+        print_state_analysis(state)
+
+    result = search_state(state, iterations, rollout_batch=rollout_batch, engine=engine,
+                          exact_max_states=exact_max_states, tt_max_entries=tt_max_entries, workers=workers,
+                          time_budget_ms=time_budget_ms, early_stop=early_stop, verbose=verbose, seed=seed,
+                          profile=profile, use_book=use_book, cache=cache, progress=progress)
+    record_search_info(search_info, result)
+    if verbose:
+        print(format_result(result))
+    return (result.move, result.win_rates) if return_win_rates else result.move
+
+def analyze_positions(api_data_list, iterations=100000, workers=1, rollout_batch=0, tt_max_entries=0,
+                      time_budget_ms=None, early_stop=False, seed=None, use_book=False, cache=None):
+    """
+    Searches many independent positions with one shared iterations/time budget.
+    Returns a list in input order holding each position's SearchResult, or the
+    exception that position raised (bad api_data, engine error), so one broken
+    item does not fail the batch. workers > 1 schedules one full search per
+    position across the warm process pool (see mcts_parallel.batch_search).
+    Per-position seeds are drawn from `seed`, so the results do not depend on
+    the worker count. use_book answers opening-book positions without a search,
+    and a DecisionCache answers previously searched ones (unseeded batches only).
+    """
+    seeder = make_rng(seed) if seed is not None else None
+    seeds = [seeder.getrandbits(64) if seeder else None for _ in api_data_list]
+
+    results = [None] * len(api_data_list)
+    pending = []
+    cache_settings = dict(rollout_batch=rollout_batch, early_stop=early_stop, tt_max_entries=tt_max_entries)
+    if use_book:
+        from opening_book import get_default_book
+        book = get_default_book()
+    for i, api_data in enumerate(api_data_list):
+        try:
+            state = build_state(api_data)
+        except Exception as e:
+            results[i] = e
+            continue
+        if use_book and book is not None:
+            results[i] = book.lookup(state)
+        if results[i] is None and cache is not None and seed is None:
+            results[i] = cache.get(state, iterations, **cache_settings)
+        if results[i] is None:
+            pending.append((i, state))
+
+    if workers > 1:
+        from mcts_parallel import batch_search
+        searched = batch_search([state for _, state in pending], iterations, workers, rollout_batch=rollout_batch,
+                                tt_max_entries=tt_max_entries, seeds=[seeds[i] for i, _ in pending],
+                                time_budget_ms=time_budget_ms, early_stop=early_stop)
+        for (i, state), result in zip(pending, searched):
+            results[i] = result
+            if cache is not None and seed is None and not isinstance(result, Exception):
+                cache.put(state, result, iterations, **cache_settings)
+        return results
+
+    for i, state in pending:
+        try:
+            results[i] = search_state(state, iterations, rollout_batch=rollout_batch, tt_max_entries=tt_max_entries,
+                                      time_budget_ms=time_budget_ms, early_stop=early_stop, seed=seeds[i],
+                                      cache=cache)
+        except Exception as e:
+            results[i] = e
+    return results
+
+def get_best_actions(api_data_list, iterations=100000, workers=1, rollout_batch=0, tt_max_entries=0,
+                     time_budget_ms=None, early_stop=False, seed=None, use_book=False, cache=None):
+    """
+    Batch version of get_best_action(): returns the best move for every api_data
+    in order, with None for positions that could not be searched (see
+    analyze_positions for the error details). Nothing is printed.
+    """
+    results = analyze_positions(api_data_list, iterations, workers=workers, rollout_batch=rollout_batch,
+                                tt_max_entries=tt_max_entries, time_budget_ms=time_budget_ms,
+                                early_stop=early_stop, seed=seed, use_book=use_book, cache=cache)
+    return [None if isinstance(result, Exception) else result.move for result in results]
+
+# --- Persistent Search Session ---
+class SearchSession:
+    """
+    Keeps the MCTS tree of one fight alive between rounds.
+
+    After each round call advance() with the moves the API reports and the new
+    api_data; the tree is re-rooted on the outcome node for that (player move,
+    enemy reply) pair and its statistics are kept. best_move(iterations) then
+    only tops the root up to `iterations` visits. If the live state does not
+    match the prediction (stat drift, equipment, a new enemy) the tree is
+    rebuilt from scratch.
+
+    The kept subtree is copied into a fresh NodeArena, so slots of the discarded
+    branches are reclaimed every round. Arenas start small and each search grows
+    them to what its iterations can add (see tree_capacity), never past
+    `capacity` nodes. With a seed the
+    whole fight's searches draw from one reproducible stream. With use_book the
+    first decision after a (re)build is looked up in the opening book first. A
+    DecisionCache passed as cache is consulted before every unseeded search and
+    receives its result (see search_state).
+    """
+    def __init__(self, api_data, rollout_batch=0, tt_max_entries=0, capacity=ARENA_CAPACITY, seed=None,
+                 use_book=False, cache=None):
+        self.rollout_batch = rollout_batch
+        self.tt_max_entries = tt_max_entries
+        self.capacity = capacity
+        self.rng = make_rng(seed)
+        self.use_book = use_book
+        # Seeded sessions always search, so they stay reproducible
+        self.cache = cache if seed is None else None
+        self.reused_visits = 0
+        self._reset(build_state(api_data))
+
+    def _reset(self, state):
+        self.root_state = state
+        self.book_pending = self.use_book
+        self.arena = NodeArena(GROWING_ARENA_CAPACITY, max_capacity=self.capacity)
+        self.transposition_table = TranspositionTable(self.tt_max_entries) if self.tt_max_entries > 0 else None
+
+    @staticmethod
+    def _matches(predicted, live):
+        """Same fight state, ignoring round_number (the live API always reports round 1)."""
+        return (predicted.key()[:-1] == live.key()[:-1] and
+                predicted.player_max_health == live.player_max_health and
+                predicted.player_max_shield == live.player_max_shield and
+                predicted.enemy_max_health == live.enemy_max_health and
+                predicted.enemy_max_shield == live.enemy_max_shield and
+                predicted.player_move_stats == live.player_move_stats and
+                predicted.enemy_move_stats == live.enemy_move_stats)
+
+    def advance(self, player_move, enemy_move, new_api_data):
+        """
+        Moves the root to the state reached by (player_move, enemy_move).
+        Returns True if an existing subtree was reused, False if the tree was rebuilt.
+        """
+        live_state = build_state(new_api_data)
+        predicted = apply_round(self.root_state.clone(), player_move, enemy_move)
+
+        if self._matches(predicted, live_state):
+            outcome = -1
+            for action in self.arena.children(self.arena.root):
+                if MOVES[self.arena.move[action]] == player_move:
+                    outcome = self.arena.find_outcome(action, enemy_move)
+            if outcome >= 0:
+                self.reused_visits = self.arena.node_visits(outcome)
+                self.arena, stat_map = self.arena.subtree(outcome)
+                # Keep the live round: the simulated one grows every round and would
+                # shrink the MAX_ROUNDS horizon until the root counts as terminal
+                round_shift = live_state.round_number - predicted.round_number
+                predicted.round_number = live_state.round_number
+                if self.transposition_table is not None:
+                    self.transposition_table.remap(stat_map)
+                    self.transposition_table.shift_rounds(round_shift)
+                self.root_state = predicted
+                return True
+
+        self.reused_visits = 0
+        self._reset(live_state)
+        return False
+
+    def search(self, iterations=100000, time_budget_ms=None, early_stop=False, verbose=False, profile=False,
+               progress=None):
+        """
+        Searches until the root has `iterations` visits (or the time budget runs
+        out, or early_stop finds the decision settled) and returns a SearchResult.
+        A book or cache hit is returned without searching; if the tree never
+        explored the move played, the next advance() rebuilds it from the live state.
+        """
+        if self.book_pending:
+            self.book_pending = False
+            from opening_book import get_default_book
+            book = get_default_book()
+            result = book.lookup(self.root_state) if book is not None else None
+            if result is not None:
+                return result
+
+        use_cache = self.cache is not None and not profile
+        cache_settings = dict(rollout_batch=self.rollout_batch, early_stop=early_stop,
+                              tt_max_entries=self.tt_max_entries)
+        if use_cache:
+            result = self.cache.get(self.root_state, iterations, **cache_settings)
+            if result is not None:
+                return result
+
+        started = time.perf_counter()
+        remaining = max(0, iterations - self.arena.node_visits(self.arena.root))
+        self.arena.reserve(len(self.arena) + tree_capacity(remaining, None))
+        search_profile = SearchProfile() if profile else None
+        completed, stop_reason = run_iterations(self.arena, self.root_state, remaining,
+                                                self.rollout_batch, self.transposition_table,
+                                                deadline=make_deadline(time_budget_ms),
+                                                early_stop=early_stop, verbose=verbose, rng=self.rng,
+                                                profile=search_profile, progress=progress)
+        result = build_result(root_children(self.arena, self.arena.root), self.root_state, completed,
+                              (time.perf_counter() - started) * 1000.0, stop_reason)
+        result.profile = search_profile
+        if use_cache:
+            self.cache.put(self.root_state, result, iterations, **cache_settings)
+        return result
 
-    best_move = mcts(state, iterations)
-    return best_move
+    def best_move(self, iterations=100000, return_win_rates=False, time_budget_ms=None, search_info=None,
+                  early_stop=False, verbose=True, profile=False, progress=None):
+        """Printing wrapper around search() that returns the chosen move."""
+        result = self.search(iterations, time_budget_ms=time_budget_ms, early_stop=early_stop, verbose=verbose,
+                             profile=profile, progress=progress)
+        record_search_info(search_info, result)
+        if verbose:
+            print(format_result(result))
+        return (result.move, result.win_rates) if return_win_rates else result.move
 
 # --- Example Usage ---
 if __name__ == "__main__":
@@ -0,0 +1,156 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import time
+
+from mcts_api_v2 import (MOVES, ChildStats, NodeArena, SearchProfile, TranspositionTable, run_iterations,
+                         root_children, tree_capacity, build_result, format_result, make_deadline,
+                         record_search_info, make_rng, mcts_search, ARENA_CAPACITY)
+
+# Warm process pools by worker count, shared by root-parallel, batch and loot work so
+# workers stay warm between moves; a caller asking for another size gets its own pool
+# instead of tearing down one that may still have work in flight
+_pools = {}
+
+
+def _init_worker():
+    """Imports the engine once per worker and silences its progress prints."""
+    import mcts_api_v2  # noqa: F401
+    sys.stdout = open(os.devnull, "w")
+
+
+def get_pool(workers):
+    """Returns the shared pool of `workers` processes, creating it on first use."""
+    pool = _pools.get(workers)
+    if pool is None:
+        pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    return pool
+
+
+def shutdown_pool():
+    """Stops every shared worker pool (e.g. on service shutdown)."""
+    for pool in _pools.values():
+        pool.shutdown(wait=True)
+    _pools.clear()
+
+
+def _search_worker(root_state, iterations, seed, rollout_batch=0, tt_max_entries=0, time_budget_ms=None,
+                   early_stop=False, profile=False, arena_capacity=ARENA_CAPACITY):
+    """
+    Runs one independent search and returns ({move: (visits, wins)}, iterations,
+    stop reason, SearchProfile or None) for the root children.
+    """
+    arena = NodeArena(tree_capacity(iterations, arena_capacity))
+    transposition_table = TranspositionTable(tt_max_entries) if tt_max_entries > 0 else None
+    search_profile = SearchProfile() if profile else None
+    completed, stop_reason = run_iterations(arena, root_state, iterations, rollout_batch,
+                                            transposition_table, deadline=make_deadline(time_budget_ms),
+                                            early_stop=early_stop, verbose=False, rng=make_rng(seed),
+                                            profile=search_profile)
+    children = root_children(arena, arena.root)
+    return ({child.move: (child.visits, child.wins) for child in children}, completed, stop_reason,
+            search_profile)
+
+
+def parallel_search(root_state, iterations=100000, workers=2, rollout_batch=0, tt_max_entries=0,
+                    seed=None, time_budget_ms=None, early_stop=False, profile=False, arena_capacity=ARENA_CAPACITY):
+    """
+    Root-parallel MCTS: splits `iterations` across `workers` independent searches
+    with independent random streams, sums the per-move visit and win counts of
+    their roots and returns a SearchResult built from the merged statistics (see
+    build_result). The worker seeds are drawn from `seed`, so the same seed and
+    worker count reproduce the same result.
+    With time_budget_ms every worker stops at the same wall-clock budget; with
+    early_stop each worker stops once its own root decision is settled.
+    With profile every worker's SearchProfile is summed into result.profile.
+    """
+    started = time.perf_counter()
+    pool = get_pool(workers)
+    per_worker = max(1, iterations // workers)
+
+    futures = [
+        pool.submit(_search_worker, root_state, per_worker, worker_seed, rollout_batch, tt_max_entries,
+                    time_budget_ms, early_stop, profile, arena_capacity)
+        for worker_seed in worker_seeds(seed, workers)
+    ]
+    return merge_worker_outputs(root_state, [future.result() for future in futures],
+                                (time.perf_counter() - started) * 1000.0)
+
+
+def worker_seeds(seed, workers):
+    """Independent per-worker seeds drawn from `seed` (reproducible for the same seed and worker count)."""
+    seeder = make_rng(seed)
+    return [seeder.getrandbits(64) for _ in range(workers)]
+
+
+def merge_worker_outputs(root_state, outputs, elapsed_ms):
+    """
+    Sums the root statistics of several _search_worker() outputs and returns the
+    SearchResult built from them; profiles (if any) are summed as well.
+    """
+    merged = {}
+    total_iterations = 0
+    stop_reasons = set()
+    merged_profile = None
+    for children, completed, stop_reason, worker_profile in outputs:
+        total_iterations += completed
+        stop_reasons.add(stop_reason)
+        if worker_profile is not None:
+            merged_profile = (merged_profile or SearchProfile()).merge(worker_profile)
+        for move, (visits, wins) in children.items():
+            stats = merged.setdefault(move, ChildStats(move, 0, 0))
+            stats.visits += visits
+            stats.wins += wins
+
+    children = [merged[move] for move in MOVES if move in merged]
+    stop_reason = stop_reasons.pop() if len(stop_reasons) == 1 else "mixed"
+    result = build_result(children, root_state, total_iterations, elapsed_ms, stop_reason)
+    result.profile = merged_profile
+    return result
+
+
+def parallel_mcts(root_state, iterations=100000, workers=2, rollout_batch=0, tt_max_entries=0,
+                  return_win_rates=False, seed=None, time_budget_ms=None, search_info=None,
+                  early_stop=False, profile=False):
+    """Printing wrapper around parallel_search() that returns the chosen move."""
+    result = parallel_search(root_state, iterations, workers, rollout_batch, tt_max_entries, seed=seed,
+                             time_budget_ms=time_budget_ms, early_stop=early_stop, profile=profile)
+    record_search_info(search_info, result)
+    print(format_result(result))
+    return (result.move, result.win_rates) if return_win_rates else result.move
+
+
+def _state_worker(root_state, iterations, seed, rollout_batch=0, tt_max_entries=0, time_budget_ms=None,
+                  early_stop=False, arena_capacity=ARENA_CAPACITY):
+    """Runs one complete single-process search for a batch item and returns its SearchResult."""
+    transposition_table = TranspositionTable(tt_max_entries) if tt_max_entries > 0 else None
+    return mcts_search(root_state, iterations, rollout_batch, transposition_table, time_budget_ms=time_budget_ms,
+                       early_stop=early_stop, seed=seed, arena_capacity=arena_capacity)
+
+
+def batch_search(states, iterations=100000, workers=2, rollout_batch=0, tt_max_entries=0, seeds=None,
+                 time_budget_ms=None, early_stop=False, arena_capacity=ARENA_CAPACITY):
+    """
+    State-parallel MCTS for many independent positions: each state gets one full
+    search with the same iterations/time budget, scheduled across the warm pool.
+    Returns a list in the order of `states` holding a SearchResult, or the
+    exception raised while searching that state. seeds (one per state) makes
+    each search reproducible. arena_capacity=None lets offline jobs size every
+    tree from iterations alone (see tree_capacity).
+    """
+    pool = get_pool(workers)
+    seeds = seeds or [None] * len(states)
+    futures = [
+        pool.submit(_state_worker, state, iterations, item_seed, rollout_batch, tt_max_entries,
+                    time_budget_ms, early_stop, arena_capacity)
+        for state, item_seed in zip(states, seeds)
+    ]
+
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return results
@@ -1,11 +1,19 @@
+import asyncio
+import os
+import time
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from typing import Any, Dict, List, Optional
 
 # Reuse existing logic
-from mcts_api_v2 import get_best_action
-from loot_manager import LootManager
+from mcts_api_v2 import build_state, make_rng
+from loot_manager import LootManager, chunk_cells, evaluate_cell_chunk
+from mcts_parallel import shutdown_pool
+from decision_cache import DecisionCache
+from opening_book import get_default_book
+from search_dispatcher import SearchDispatcher, Overloaded, DeadlineExpired
 
 app = FastAPI(title="Gigaverse Local MCTS Service", version="1.0.0")
 
@@ -17,6 +25,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Decisions shared by every request (and every service process via the SQLite file)
+decision_cache = DecisionCache()
+
+# --- Search Pool ---
+# Searches run on a dedicated process pool so the event loop (and /health) stays
+# responsive; requests beyond workers + max queue are turned away with a 503
+SERVICE_WORKERS = int(os.environ.get("MCTS_SERVICE_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+SERVICE_MAX_QUEUE = int(os.environ.get("MCTS_SERVICE_MAX_QUEUE", SERVICE_WORKERS * 4))
+SERVICE_DEADLINE_MS = int(os.environ.get("MCTS_SERVICE_DEADLINE_MS", 15000))
+RETRY_AFTER_SECONDS = 1
+
+dispatcher = SearchDispatcher(workers=SERVICE_WORKERS, max_queued=SERVICE_MAX_QUEUE)
+
 
 class GameStatePayload(BaseModel):
     player_health: int
@@ -39,36 +60,185 @@ class GameStatePayload(BaseModel):
 class MoveRequest(BaseModel):
     gameState: GameStatePayload
     iterations: Optional[int] = 25000
+    workers: Optional[int] = 1  # >1 runs a root-parallel search across a warm process pool
+    timeBudgetMs: Optional[int] = None  # anytime search: stop at this wall-clock budget
+    earlyStop: Optional[bool] = False  # stop once the leading move can no longer be overtaken
+    seed: Optional[int] = None  # same seed + same state = same answer
+    useCache: Optional[bool] = True  # reuse a decision searched with at least this many iterations
+    useBook: Optional[bool] = False  # answer first-round states from the opening book
+    deadlineMs: Optional[int] = None  # answer (or 503) within this long, queueing included
 
 
 class MoveResponse(BaseModel):
     success: bool
     move: str
+    iterations: Optional[int] = None
+    elapsedMs: Optional[float] = None
+    stopReason: Optional[str] = None
+    winRates: Optional[Dict[str, float]] = None
+
+
+class MovesRequest(BaseModel):
+    # Items are validated one by one so a malformed state only fails its own slot
+    gameStates: List[Dict[str, Any]]
+    iterations: Optional[int] = 25000  # shared by every state
+    workers: Optional[int] = 1  # ignored: the states are already spread across the search pool
+    timeBudgetMs: Optional[int] = None  # per-state anytime budget
+    earlyStop: Optional[bool] = False
+    seed: Optional[int] = None
+    useCache: Optional[bool] = True
+    useBook: Optional[bool] = False
+    deadlineMs: Optional[int] = None  # for the whole batch
+
+
+class BatchMoveResult(BaseModel):
+    success: bool
+    move: Optional[str] = None
+    iterations: Optional[int] = None
+    elapsedMs: Optional[float] = None
+    stopReason: Optional[str] = None
+    winRates: Optional[Dict[str, float]] = None
+    error: Optional[str] = None
+    field: Optional[str] = None  # the offending gameState field, for validation errors
+
+
+class MovesResponse(BaseModel):
+    success: bool
+    results: List[BatchMoveResult]
+
+
+def to_api_data(gs: GameStatePayload):
+    """Converts a request game state into the api_data dict the MCTS engine expects."""
+    return {
+        "player_move_stats": gs.player_move_stats,
+        "enemy_move_stats": gs.enemy_move_stats,
+        "initial_state": {
+            "player_health": gs.player_health,
+            "player_shield": gs.player_shield,
+            "enemy_health": gs.enemy_health,
+            "enemy_shield": gs.enemy_shield,
+            "player_max_health": gs.player_max_health,
+            "player_max_shield": gs.player_max_shield,
+            "enemy_max_health": gs.enemy_max_health,
+            "enemy_max_shield": gs.enemy_max_shield,
+            "round_number": gs.round_number,
+        },
+        "player_charges": gs.player_charges,
+        "enemy_charges": gs.enemy_charges,
+    }
+
+
+def request_deadline(deadline_ms):
+    """Absolute time.time() deadline for a request (SERVICE_DEADLINE_MS when not given)."""
+    return time.time() + (deadline_ms or SERVICE_DEADLINE_MS) / 1000.0
+
+
+def unavailable(e):
+    """503 for a full queue or a missed deadline; the client should retry or fall back."""
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+
+def item_error(e):
+    """Failed BatchMoveResult: the first validation error and its field, or the exception's first line."""
+    if isinstance(e, ValidationError):
+        first = e.errors()[0]
+        return BatchMoveResult(success=False, error=first["msg"], field=".".join(str(p) for p in first["loc"]))
+    return BatchMoveResult(success=False, error=(str(e) or type(e).__name__).splitlines()[0])
+
+
+def known_result(state, iterations, use_cache, seed, early_stop, use_book=False):
+    """
+    Opening book (only when use_book) or decision cache answer for `state`, looked
+    up in-process; None if a search is needed. Touches disk, so endpoints call it
+    through asyncio.to_thread.
+    """
+    result = None
+    if use_book:
+        book = get_default_book()
+        result = book.lookup(state) if book is not None else None
+    if result is None and use_cache and seed is None:
+        result = decision_cache.get(state, iterations, early_stop=early_stop)
+    return result
 
 
 @app.post("/mcts/move", response_model=MoveResponse)
-def mcts_move(req: MoveRequest):
+async def mcts_move(req: MoveRequest):
+    deadline = request_deadline(req.deadlineMs)
+    iterations = req.iterations or 25000
+    use_cache = bool(req.useCache) and req.seed is None
     try:
-        gs = req.gameState
-        api_data = {
-            "player_move_stats": gs.player_move_stats,
-            "enemy_move_stats": gs.enemy_move_stats,
-            "initial_state": {
-                "player_health": gs.player_health,
-                "player_shield": gs.player_shield,
-                "enemy_health": gs.enemy_health,
-                "enemy_shield": gs.enemy_shield,
-                "player_max_health": gs.player_max_health,
-                "player_max_shield": gs.player_max_shield,
-                "enemy_max_health": gs.enemy_max_health,
-                "enemy_max_shield": gs.enemy_max_shield,
-                "round_number": gs.round_number,
-            },
-            "player_charges": gs.player_charges,
-            "enemy_charges": gs.enemy_charges,
-        }
-        move = get_best_action(api_data, iterations=req.iterations or 25000)
-        return MoveResponse(success=True, move=move)
+        state = build_state(to_api_data(req.gameState))
+        result = await asyncio.to_thread(known_result, state, iterations, use_cache, req.seed,
+                                         bool(req.earlyStop), bool(req.useBook))
+        if result is None:
+            result = await dispatcher.search(state, iterations, deadline, workers=max(1, req.workers or 1),
+                                             time_budget_ms=req.timeBudgetMs, early_stop=bool(req.earlyStop),
+                                             seed=req.seed)
+            if use_cache:
+                await asyncio.to_thread(decision_cache.put, state, result, iterations, early_stop=bool(req.earlyStop))
+        return MoveResponse(success=True, move=result.move, iterations=result.iterations,
+                            elapsedMs=result.elapsed_ms, stopReason=result.stop_reason,
+                            winRates=result.win_rates)
+    except (Overloaded, DeadlineExpired) as e:
+        raise unavailable(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/mcts/moves", response_model=MovesResponse)
+async def mcts_moves(req: MovesRequest):
+    """Best moves for many states in one call; results keep the request order."""
+    deadline = request_deadline(req.deadlineMs)
+    iterations = req.iterations or 25000
+    use_cache = bool(req.useCache) and req.seed is None
+    # Same per-item seeds as analyze_positions()
+    seeder = make_rng(req.seed) if req.seed is not None else None
+    try:
+        states = []
+        seeds = []
+        for raw in req.gameStates:
+            seeds.append(seeder.getrandbits(64) if seeder else None)
+            try:
+                states.append(build_state(to_api_data(GameStatePayload(**raw))))
+            except Exception as e:
+                states.append(e)
+
+        def lookup_all():
+            return [None if isinstance(state, Exception) else
+                    known_result(state, iterations, use_cache, req.seed, bool(req.earlyStop), bool(req.useBook))
+                    for state in states]
+
+        known = await asyncio.to_thread(lookup_all)
+        searched = [(i, state, seed) for i, (state, seed, result) in enumerate(zip(states, seeds, known))
+                    if result is None and not isinstance(state, Exception)]
+        results = [result if result is not None else state for state, result in zip(states, known)]
+
+        if searched:
+            found = await dispatcher.search_many([state for _, state, _ in searched], iterations, deadline,
+                                                 seeds=[seed for _, _, seed in searched],
+                                                 time_budget_ms=req.timeBudgetMs,
+                                                 early_stop=bool(req.earlyStop))
+            for (i, _, _), result in zip(searched, found):
+                results[i] = result
+            if use_cache:
+                def store_all():
+                    for (_, state, _), result in zip(searched, found):
+                        if not isinstance(result, Exception):
+                            decision_cache.put(state, result, iterations, early_stop=bool(req.earlyStop))
+
+                await asyncio.to_thread(store_all)
+
+        response = []
+        for result in results:
+            if isinstance(result, Exception):
+                response.append(item_error(result))
+            else:
+                response.append(BatchMoveResult(success=True, move=result.move, iterations=result.iterations,
+                                                elapsedMs=result.elapsed_ms, stopReason=result.stop_reason,
+                                                winRates=result.win_rates))
+        return MovesResponse(success=all(r.success for r in response), results=response)
+    except Overloaded as e:
+        raise unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -77,12 +247,47 @@ class LootChooseRequest(BaseModel):
     gameState: GameStatePayload
     lootOptions: List[Dict[str, Any]]
     simIterations: Optional[int] = 100
+    seed: Optional[int] = None
+    deadlineMs: Optional[int] = None
+    racing: Optional[bool] = False  # race the options, dropping clearly worse ones early (simIterations caps the cost)
+    mode: Optional[str] = "underhaul"  # dungeon mode whose future enemies the options are scored against
+
+
+def choose_loot(loot_options, state_data, gs, sim_iterations, seed, racing, evaluate, mode="underhaul"):
+    """
+    (index, option, rollouts spent) of LootManager's pick among loot_options for
+    dungeon `mode`; evaluate(cells) runs the simulations.
+    """
+    lm = LootManager(mode)
+    search_info = {}
+    best_option = lm.select_best_loot_option(
+        loot_options=loot_options,
+        state_data=state_data,
+        player_move_stats=gs.player_move_stats,
+        enemy_move_stats=gs.enemy_move_stats,
+        player_charges=gs.player_charges,
+        enemy_charges=gs.enemy_charges,
+        sim_iterations=sim_iterations,
+        current_floor=state_data["current_floor"],
+        current_room=state_data["current_room"],
+        seed=seed,
+        evaluate=evaluate,
+        racing=racing,
+        search_info=search_info,
+    )
+    # Find index in the original array
+    index = 0
+    for i, o in enumerate(loot_options):
+        if o == best_option:
+            index = i
+            break
+    return index, best_option, search_info.get("rollouts")
 
 
 @app.post("/loot/choose")
-def loot_choose(req: LootChooseRequest):
+async def loot_choose(req: LootChooseRequest):
+    deadline = request_deadline(req.deadlineMs)
     try:
-        lm = LootManager()
         gs = req.gameState
         state_data = {
             "player_health": gs.player_health,
@@ -97,34 +302,52 @@ def loot_choose(req: LootChooseRequest):
             "current_floor": gs.current_floor or 1,
             "current_room": gs.current_room or 1,
         }
-        best_option = lm.select_best_loot_option(
-            loot_options=list(req.lootOptions),
-            state_data=state_data,
-            player_move_stats=gs.player_move_stats,
-            enemy_move_stats=gs.enemy_move_stats,
-            player_charges=gs.player_charges,
-            enemy_charges=gs.enemy_charges,
-            sim_iterations=req.simIterations or 100,
-            current_floor=gs.current_floor or 1,
-            current_room=gs.current_room or 1,
-        )
-        # Find index in the original array
-        index = 0
-        for i, o in enumerate(req.lootOptions):
-            if o == best_option:
-                index = i
-                break
+        loop = asyncio.get_running_loop()
+
+        def evaluate(cells):
+            # The (option, enemy) grid is split across the search pool; called from the selection thread
+            chunks = chunk_cells(cells, dispatcher.workers)
+            future = asyncio.run_coroutine_threadsafe(dispatcher.map(deadline, evaluate_cell_chunk, chunks), loop)
+            return [rate for chunk in future.result() for rate in chunk]
+
+        # Selection itself is cheap bookkeeping; it runs in a thread so the event loop stays free
+        index, best_option, rollouts = await asyncio.to_thread(choose_loot, req.lootOptions, state_data, gs,
+                                                               req.simIterations or 100, req.seed,
+                                                               bool(req.racing), evaluate,
+                                                               req.mode or "underhaul")
         return {
             "success": True,
             "index": index,
             "loot": best_option,
+            "rollouts": rollouts,
         }
+    except (Overloaded, DeadlineExpired) as e:
+        raise unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/mcts/cache/stats")
+def mcts_cache_stats():
+    # Sync endpoint: FastAPI runs it in its threadpool, off the event loop
+    return decision_cache.stats()
+
+
+@app.get("/mcts/queue/stats")
+async def mcts_queue_stats():
+    return dispatcher.stats()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    dispatcher.shutdown()
+    shutdown_pool()
+    decision_cache.close()
+
+
 @app.get("/health")
-def health():
-    return {"ok": True}
+async def health():
+    # Answered on the event loop; never waits behind a search
+    return {"ok": True, "pending": dispatcher.pending, "capacity": dispatcher.max_pending}
 
 
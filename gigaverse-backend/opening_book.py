@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Opening book for combat MCTS.
+
+Every fight starts from the enemy's full HP/shield and full charges on both
+sides, and the player only brings a handful of builds, so the first decisions
+repeat constantly. This module precomputes them offline with a long MCTS (or
+exact) search and stores the best move plus the root win rates per position in
+a small JSON file. get_best_action() looks positions up here before searching.
+
+Build a book from a JSON list of builds, each
+{"player_move_stats": {...}, "player_max_health": N, "player_max_shield": N}:
+
+    python opening_book.py --builds builds.json --iterations 200000 --workers 4 --depth 2
+"""
+
+import argparse
+import json
+import os
+import time
+
+from mcts_api_v2 import (MOVES, GameState, MoveScore, SearchResult, apply_round, search_state,
+                         make_rng, state_signature)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BOOK_PATH = os.path.join(BASE_DIR, "opening_book.json")
+ENEMY_FILES = ("enemy_stats.json", "underhaul_enemy_stats.json")
+BOOK_VERSION = 1
+
+# Player HP/shield grid (fractions of max) the book is built for
+DEFAULT_HEALTH_RATIOS = (1.0, 0.75, 0.5, 0.25)
+DEFAULT_SHIELD_RATIOS = (1.0, 0.5, 0.0)
+
+
+def book_key(state):
+    """
+    state_signature() without round_number: book positions are stored at round 1,
+    which is what the live API always reports.
+    """
+    return state_signature(state, include_round=False)
+
+
+class OpeningBook:
+    """
+    {book_key: [best move, win rate per MOVES entry (None if not searched)]} plus
+    the settings it was built with. lookup() turns a hit into a SearchResult
+    with engine "book".
+    """
+    def __init__(self, positions=None, meta=None):
+        self.positions = positions if positions is not None else {}
+        self.meta = meta or {}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def add(self, state, result):
+        win_rates = result.win_rates
+        self.positions[book_key(state)] = [result.move] + [round(win_rates[m], 4) if m in win_rates else None
+                                                           for m in MOVES]
+
+    def lookup(self, state):
+        """SearchResult for `state` if it is in the book, otherwise None."""
+        entry = self.positions.get(book_key(state))
+        if entry is None:
+            return None
+        moves = [MoveScore(move=move, visits=0, wins=0.0, win_rate=win_rate, charge=state.player_charges[move],
+                           final_score=win_rate)
+                 for move, win_rate in zip(MOVES, entry[1:]) if win_rate is not None]
+        return SearchResult(move=entry[0], moves=moves, stop_reason="book", engine="book", selection="book")
+
+    def save(self, path=DEFAULT_BOOK_PATH):
+        with open(path, "w") as f:
+            json.dump({"version": BOOK_VERSION, "meta": self.meta, "positions": self.positions}, f,
+                      separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path=DEFAULT_BOOK_PATH):
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != BOOK_VERSION:
+            raise ValueError(f"Unsupported opening book version: {data.get('version')}")
+        return cls(data["positions"], data.get("meta"))
+
+
+_default_book = None
+_default_book_loaded = False
+
+
+def get_default_book():
+    """The book at DEFAULT_BOOK_PATH, loaded once; None if there is no book file."""
+    global _default_book, _default_book_loaded
+    if not _default_book_loaded:
+        _default_book_loaded = True
+        if os.path.exists(DEFAULT_BOOK_PATH):
+            try:
+                _default_book = OpeningBook.load(DEFAULT_BOOK_PATH)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring opening book {DEFAULT_BOOK_PATH}: {e}")
+    return _default_book
+
+
+# --- Book Generation ---
+def load_enemies():
+    """Every floor/room enemy from the enemy stats files."""
+    enemies = []
+    for filename in ENEMY_FILES:
+        with open(os.path.join(BASE_DIR, filename), "r") as f:
+            for rooms in json.load(f)["enemies"].values():
+                enemies.extend(rooms.values())
+    return enemies
+
+
+def opening_states(builds, enemies, health_ratios=DEFAULT_HEALTH_RATIOS, shield_ratios=DEFAULT_SHIELD_RATIOS,
+                   depth=1):
+    """
+    Distinct opening positions: each build at each HP/shield ratio against each
+    enemy at full HP/shield with full charges. depth=2 also adds every
+    non-terminal position after one round of play.
+    """
+    states = {}
+    for build in builds:
+        max_health, max_shield = build["player_max_health"], build["player_max_shield"]
+        for enemy in enemies:
+            for health_ratio in health_ratios:
+                for shield_ratio in shield_ratios:
+                    state = GameState(max(1, round(max_health * health_ratio)), round(max_shield * shield_ratio),
+                                      enemy["health"], enemy["shield"], max_health, max_shield,
+                                      enemy["health"], enemy["shield"],
+                                      player_move_stats=build["player_move_stats"],
+                                      enemy_move_stats=enemy["moves"])
+                    states.setdefault(book_key(state), state)
+                    if depth < 2:
+                        continue
+                    for player_move in MOVES:
+                        for enemy_move in MOVES:
+                            child = apply_round(state.clone(), player_move, enemy_move)
+                            if not child.is_terminal():
+                                child.round_number = 1
+                                states.setdefault(book_key(child), child)
+    return list(states.values())
+
+
+def build_book(states, iterations=200000, engine="mcts", workers=1, seed=None):
+    """
+    Searches every state and returns the resulting OpeningBook. Trees are sized
+    from iterations without the live ARENA_CAPACITY cap, so long searches never
+    stop early on a full arena.
+    """
+    book = OpeningBook(meta={"engine": engine, "iterations": iterations, "seed": seed,
+                             "built": time.strftime("%Y-%m-%dT%H:%M:%S")})
+    seeder = make_rng(seed) if seed is not None else None
+    seeds = [seeder.getrandbits(64) if seeder else None for _ in states]
+    started = time.perf_counter()
+
+    if workers > 1 and engine == "mcts":
+        from mcts_parallel import batch_search
+        results = batch_search(states, iterations, workers, seeds=seeds, arena_capacity=None)
+    else:
+        results = []
+        for i, (state, state_seed) in enumerate(zip(states, seeds)):
+            results.append(search_state(state, iterations, engine=engine, seed=state_seed, arena_capacity=None))
+            if (i + 1) % 50 == 0:
+                print(f"Opening book: {i + 1}/{len(states)} positions ({time.perf_counter() - started:.0f}s)")
+
+    for state, result in zip(states, results):
+        if isinstance(result, Exception):
+            print(f"Skipping position {book_key(state)}: {result}")
+            continue
+        book.add(state, result)
+    print(f"Opening book: {len(book)} positions in {time.perf_counter() - started:.0f}s")
+    return book
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute opening moves for every enemy")
+    parser.add_argument("--builds", required=True, help="JSON list of player builds")
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--engine", choices=("mcts", "exact"), default="mcts",
+                        help="exact falls back to MCTS for positions too large to solve")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--depth", type=int, choices=(1, 2), default=1,
+                        help="2 also books every position after the first round")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=DEFAULT_BOOK_PATH)
+    args = parser.parse_args()
+
+    with open(args.builds, "r") as f:
+        builds = json.load(f)
+    states = opening_states(builds, load_enemies(), depth=args.depth)
+    print(f"Opening book: searching {len(states)} positions ({args.engine}, {args.iterations} iterations)")
+    book = build_book(states, args.iterations, args.engine, args.workers, args.seed)
+    book.save(args.output)
+    print(f"Saved {args.output} ({os.path.getsize(args.output) // 1024} KB)")
+
+
+if __name__ == "__main__":
+    main()
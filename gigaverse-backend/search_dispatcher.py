@@ -0,0 +1,159 @@
+"""
+Process-pool dispatcher for the async MCTS service endpoints.
+
+CPU-bound searches run in a dedicated, fixed-size process pool so the event
+loop (and cheap endpoints such as /health) never waits on them. Admission is
+bounded: at most `workers + max_queued` jobs may be running or queued, and a
+request that does not fit is rejected immediately with Overloaded instead of
+queueing without limit. Every job carries an absolute deadline; a job still
+queued at its deadline is dropped, and searches get their time budget clamped
+to the time left when they start.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from mcts_parallel import _init_worker, _search_worker, merge_worker_outputs, worker_seeds
+
+# Searches stop this much before the deadline so the result can travel back in time
+DEADLINE_MARGIN_MS = 50
+
+
+class Overloaded(Exception):
+    """Raised when a request does not fit in the dispatcher's bounded queue."""
+    pass
+
+
+class DeadlineExpired(Exception):
+    """Raised when a job's deadline passes before it produces a result."""
+    pass
+
+
+def _run_job(deadline, fn, args, kwargs):
+    """
+    Worker-side wrapper: skips jobs whose deadline already passed while queued
+    and clamps a time_budget_ms keyword to the time that is left.
+    """
+    remaining_ms = (deadline - time.time()) * 1000.0 - DEADLINE_MARGIN_MS
+    if remaining_ms <= 0:
+        raise DeadlineExpired("deadline passed while queued")
+    if "time_budget_ms" in kwargs:
+        requested = kwargs["time_budget_ms"]
+        kwargs["time_budget_ms"] = remaining_ms if requested is None else min(requested, remaining_ms)
+    return fn(*args, **kwargs)
+
+
+def _search_job(state, iterations, seed=None, time_budget_ms=None, early_stop=False):
+    from mcts_api_v2 import search_state
+    return search_state(state, iterations, time_budget_ms=time_budget_ms, early_stop=early_stop, seed=seed)
+
+
+class SearchDispatcher:
+    """
+    Runs jobs on a private ProcessPoolExecutor of `workers` processes with at
+    most `max_queued` jobs waiting behind the busy ones. Deadlines are absolute
+    time.time() values so they mean the same thing inside the workers.
+    """
+    def __init__(self, workers=2, max_queued=8):
+        self.workers = workers
+        self.max_pending = workers + max_queued
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.expired = 0
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "capacity": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "expired": self.expired,
+        }
+
+    def reserve(self, jobs):
+        """Claims `jobs` queue slots at once or raises Overloaded without claiming any."""
+        with self._lock:
+            if self.pending + jobs > self.max_pending:
+                self.rejected += 1
+                raise Overloaded(f"{self.pending} jobs pending, capacity {self.max_pending}")
+            self.pending += jobs
+
+    def _release(self, future):
+        with self._lock:
+            self.pending -= 1
+            if not future.cancelled() and future.exception() is None:
+                self.completed += 1
+
+    async def submit(self, deadline, fn, *args, **kwargs):
+        """
+        Runs fn(*args, **kwargs) in the pool on a slot taken with reserve() and
+        returns its result, or raises DeadlineExpired once `deadline` passes.
+        """
+        try:
+            future = self.pool.submit(_run_job, deadline, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self.pending -= 1
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=max(0.0, deadline - time.time()))
+        except asyncio.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self.expired += 1
+            raise DeadlineExpired("deadline passed before the search finished")
+
+    async def map(self, deadline, fn, items):
+        """fn(item) for every item on the pool, admitted together or not at all; results in order."""
+        self.reserve(len(items))
+        return await asyncio.gather(*[self.submit(deadline, fn, item) for item in items])
+
+    async def search(self, state, iterations, deadline, workers=1, time_budget_ms=None, early_stop=False, seed=None):
+        """
+        SearchResult for one state. workers > 1 runs that many root-parallel
+        searches on the pool and merges them like mcts_parallel.parallel_search.
+        """
+        self.reserve(workers)
+        if workers <= 1:
+            return await self.submit(deadline, _search_job, state, iterations, seed=seed,
+                                     time_budget_ms=time_budget_ms, early_stop=early_stop)
+
+        started = time.perf_counter()
+        per_worker = max(1, iterations // workers)
+        outputs = await asyncio.gather(*[
+            self.submit(deadline, _search_worker, state, per_worker, worker_seed, time_budget_ms=time_budget_ms,
+                        early_stop=early_stop)
+            for worker_seed in worker_seeds(seed, workers)
+        ])
+        return merge_worker_outputs(state, outputs, (time.perf_counter() - started) * 1000.0)
+
+    async def search_many(self, states, iterations, deadline, seeds=None, time_budget_ms=None, early_stop=False):
+        """
+        One single-process search per state, all admitted together or not at all.
+        Returns results in order, with the exception in place of a failed search.
+        """
+        self.reserve(len(states))
+        seeds = seeds or [None] * len(states)
+        return await asyncio.gather(*[
+            self.submit(deadline, _search_job, state, iterations, seed=seed, time_budget_ms=time_budget_ms,
+                        early_stop=early_stop)
+            for state, seed in zip(states, seeds)
+        ], return_exceptions=True)
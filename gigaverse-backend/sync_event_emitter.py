@@ -1,5 +1,5 @@
 import json
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from datetime import datetime
 from collections import deque
 
@@ -127,12 +127,15 @@ class SyncEventEmitter:
             "message": "Move Stats: " + " | ".join(stats_text)
         }, "player")
     
-    def emit_move_calculation(self, message: str = "Calculating best move..."):
-        """Emit move calculation status"""
-        self.emit_event("move_calculation", {
+    def emit_move_calculation(self, message: str = "Calculating best move...", progress: Optional[Dict[str, Any]] = None):
+        """Emit move calculation status, optionally with a search progress snapshot (SearchResult.summary())"""
+        data = {
             "message": f"🤔 {message}",
             "status": "calculating"
-        }, "combat")
+        }
+        if progress is not None:
+            data["progress"] = progress
+        self.emit_event("move_calculation", data, "combat")
     
     def emit_move_selected(self, move: str, symbol: str):
         """Emit selected move"""
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Batch rollout parity: simulate_batch() must play the same policy as the scalar
+simulate(), so their win rates agree within sampling noise on fixed states.
+
+    python -m pytest -q test_batch_rollout.py
+"""
+
+import random
+
+import numpy as np
+
+from batch_rollout import simulate_batch
+from mcts_api_v2 import GameState, simulate
+
+ROLLOUTS = 4000
+MAX_Z = 4.0
+
+# (player HP/shield, enemy HP/shield, player stats, enemy stats, player charges)
+STATES = [
+    ((20, 5), (12, 4), (6, 2, 4, 3, 2, 5), (4, 1, 3, 2, 5, 0), (3, 3, 3)),
+    ((8, 0), (20, 6), (5, 0, 3, 4, 2, 2), (6, 2, 2, 4, 3, 1), (1, 2, 3)),
+    ((14, 3), (30, 10), (8, 1, 6, 2, 4, 4), (7, 3, 5, 2, 9, 0), (3, 1, 2)),
+    ((5, 2), (6, 0), (3, 3, 2, 2, 7, 0), (3, 0, 3, 0, 3, 0), (2, 2, 1)),
+]
+
+
+def make_state(player, enemy, player_stats, enemy_stats, player_charges):
+    def stats(values):
+        return {m: {"damage": values[2 * i], "shield": values[2 * i + 1]}
+                for i, m in enumerate(("rock", "paper", "scissor"))}
+
+    state = GameState(player_health=player[0], player_shield=player[1], enemy_health=enemy[0],
+                      enemy_shield=enemy[1], player_max_health=player[0], player_max_shield=max(player[1], 5),
+                      enemy_max_health=enemy[0], enemy_max_shield=enemy[1],
+                      player_move_stats=stats(player_stats), enemy_move_stats=stats(enemy_stats))
+    state.player_charges = dict(zip(("rock", "paper", "scissor"), player_charges))
+    return state
+
+
+def test_batch_win_rate_matches_scalar():
+    rng = random.Random(11)
+    batch_rng = np.random.default_rng(11)
+    for spec in STATES:
+        state = make_state(*spec)
+        scalar = sum(simulate(state, rng) for _ in range(ROLLOUTS)) / ROLLOUTS
+        batch = simulate_batch(state, ROLLOUTS, batch_rng)
+        pooled = (scalar + batch) / 2
+        error = (2 * pooled * (1 - pooled) / ROLLOUTS) ** 0.5
+        if error == 0:
+            assert scalar == batch
+        else:
+            assert abs(scalar - batch) / error < MAX_Z, (spec, scalar, batch)
+
+
+if __name__ == "__main__":
+    test_batch_win_rate_matches_scalar()
+    print("ok")
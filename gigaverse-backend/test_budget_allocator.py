@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+BudgetAllocator tests: states are classified by how much the decision matters,
+budgets follow the class and last round's gap, and a run cap holds.
+
+    python -m pytest -q test_budget_allocator.py
+"""
+
+from budget_allocator import CLASS_SCALES, CLOSE_FACTOR, DECISIVE_FACTOR, BudgetAllocator
+from mcts_api_v2 import build_state
+
+
+def make_state(player_health=20, enemy_health=20, player_damage=5, enemy_damage=5, player_charges=None):
+    return build_state({
+        "player_move_stats": {m: {"damage": player_damage, "shield": 0} for m in ("rock", "paper", "scissor")},
+        "enemy_move_stats": {m: {"damage": enemy_damage, "shield": 0} for m in ("rock", "paper", "scissor")},
+        "initial_state": {"player_health": player_health, "player_shield": 0, "enemy_health": enemy_health,
+                          "enemy_shield": 0, "player_max_health": 20, "player_max_shield": 0,
+                          "enemy_max_health": 20, "enemy_max_shield": 0},
+        "player_charges": player_charges or {"rock": 3, "paper": 3, "scissor": 3},
+        "enemy_charges": {"rock": 3, "paper": 3, "scissor": 3},
+    })
+
+
+def test_classify():
+    allocator = BudgetAllocator()
+    assert allocator.classify(make_state(player_charges={"rock": 1, "paper": 0, "scissor": 0})) == "forced"
+    assert allocator.classify(make_state(enemy_health=4)) == "killing"
+    assert allocator.classify(make_state()) == "close"
+    assert allocator.classify(make_state(player_damage=10, enemy_damage=2)) == "comfortable"
+    assert allocator.classify(make_state(player_damage=2, enemy_damage=10)) == "desperate"
+
+
+def test_allocate_scales_with_class_and_previous_gap():
+    allocator = BudgetAllocator(base_iterations=10000, min_iterations=500, max_iterations=50000)
+    close = make_state()
+    assert allocator.allocate(close) == int(10000 * CLASS_SCALES["close"])
+    assert allocator.allocate(make_state(enemy_health=4)) == int(10000 * CLASS_SCALES["killing"])
+    assert allocator.allocate(make_state(player_charges={"rock": 1, "paper": 0, "scissor": 0})) == 500
+
+    allocator.record(1000, {"rock": 0.9, "paper": 0.3, "scissor": 0.2})
+    assert allocator.allocate(close) == int(10000 * CLASS_SCALES["close"] * DECISIVE_FACTOR)
+    allocator.record(1000, {"rock": 0.51, "paper": 0.50, "scissor": 0.2})
+    assert allocator.allocate(close) == int(10000 * CLASS_SCALES["close"] * CLOSE_FACTOR)
+    allocator.end_fight()
+    assert allocator.allocate(close) == int(10000 * CLASS_SCALES["close"])
+
+
+def test_run_budget_caps_the_run():
+    allocator = BudgetAllocator(base_iterations=10000, min_iterations=500, run_budget=20000)
+    close = make_state()
+    allocator.record(allocator.allocate(close))
+    assert allocator.allocate(close) == 20000 - 12500
+    allocator.record(allocator.allocate(close))
+    # Once the run budget is spent every decision gets the minimum
+    assert allocator.allocate(close) == 500
+    assert allocator.summary()["iterations"] == 20000 and allocator.summary()["decisions"] == 2
+
+
+if __name__ == "__main__":
+    test_classify()
+    test_allocate_scales_with_class_and_previous_gap()
+    test_run_budget_caps_the_run()
+    print("ok")
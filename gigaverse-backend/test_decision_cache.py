@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+DecisionCache tests: entries are keyed by the search settings as well as the
+state, and a SearchSession consults the cache before searching.
+
+    python -m pytest -q test_decision_cache.py
+"""
+
+from decision_cache import DecisionCache
+from mcts_api_v2 import SearchSession, build_state, search_state
+from test_search_session import LONG_FIGHT
+
+SETTINGS = [
+    {},
+    {"engine": "exact"},
+    {"rollout_batch": 64},
+    {"early_stop": True},
+    {"tt_max_entries": 10000},
+]
+
+
+def test_key_changes_with_search_settings():
+    state = build_state(LONG_FIGHT)
+    keys = [DecisionCache.key(state, **settings) for settings in SETTINGS]
+    assert len(set(keys)) == len(keys)
+    # Defaults spelled out give the plain key
+    assert DecisionCache.key(state, engine="mcts", rollout_batch=0, early_stop=False,
+                             tt_max_entries=0) == keys[0]
+
+
+def test_lookup_only_hits_same_settings():
+    cache = DecisionCache(path=None)
+    state = build_state(LONG_FIGHT)
+    result = search_state(state, 300, seed=1)
+    cache.put(state, result, 300, early_stop=True)
+
+    assert cache.get(state, 300) is None
+    assert cache.get(state, 300, rollout_batch=64) is None
+    hit = cache.get(state, 300, early_stop=True)
+    assert hit is not None and hit.move == result.move and hit.engine == "cache"
+    # A smaller budget is answered, a larger one is not
+    assert cache.get(state, 100, early_stop=True) is not None
+    assert cache.get(state, 1000, early_stop=True) is None
+
+
+def test_session_consults_cache():
+    cache = DecisionCache(path=None)
+    first = SearchSession(LONG_FIGHT, cache=cache)
+    searched = first.search(300)
+    assert searched.engine == "mcts" and cache.stores == 1
+
+    second = SearchSession(LONG_FIGHT, cache=cache)
+    hit = second.search(300)
+    assert hit.engine == "cache" and hit.move == searched.move
+
+    # Seeded sessions stay reproducible and never read the cache
+    assert SearchSession(LONG_FIGHT, cache=cache, seed=3).search(300).engine == "mcts"
+
+
+if __name__ == "__main__":
+    test_key_changes_with_search_settings()
+    test_lookup_only_hits_same_settings()
+    test_session_consults_cache()
+    print("ok")
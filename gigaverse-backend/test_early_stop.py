@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Early stopping tests: check_early_stop() only reports a settled decision when
+build_result() could no longer pick a different move, including its
+killing-move override, and an early-stopped search agrees with a full one.
+
+    python -m pytest -q test_early_stop.py
+"""
+
+from mcts_api_v2 import ChildStats, build_result, build_state, check_early_stop, is_killing_move, search_state
+
+# Rock kills the enemy this round (9 damage > 5 health + 2 shield); paper and scissor do not
+KILLING_FIGHT = {
+    "player_move_stats": {"rock": {"damage": 9, "shield": 0}, "paper": {"damage": 2, "shield": 2},
+                          "scissor": {"damage": 2, "shield": 1}},
+    "enemy_move_stats": {"rock": {"damage": 3, "shield": 1}, "paper": {"damage": 3, "shield": 1},
+                         "scissor": {"damage": 3, "shield": 1}},
+    "initial_state": {"player_health": 10, "player_shield": 0, "enemy_health": 5, "enemy_shield": 2,
+                      "player_max_health": 10, "player_max_shield": 5, "enemy_max_health": 10,
+                      "enemy_max_shield": 5},
+    "player_charges": {"rock": 3, "paper": 3, "scissor": 3},
+    "enemy_charges": {"rock": 3, "paper": 3, "scissor": 3},
+}
+
+
+def children(rock, paper, scissor, visits=10000):
+    return [ChildStats("rock", visits, rock * visits), ChildStats("paper", visits, paper * visits),
+            ChildStats("scissor", visits, scissor * visits)]
+
+
+def test_killing_override_must_be_settled():
+    state = build_state(KILLING_FIGHT)
+    assert is_killing_move(state, "rock") and not is_killing_move(state, "paper")
+
+    # Paper leads on win rate, but build_result() picks rock while it stays above 0.5,
+    # and 0.52 is not clearly above it yet
+    close = children(0.52, 0.95, 0.5)
+    assert build_result(close, state).move == "rock"
+    assert check_early_stop(close, 30000, state, remaining=0) is None
+
+    clear = children(0.6, 0.95, 0.5)
+    assert build_result(clear, state).move == "rock"
+    assert check_early_stop(clear, 30000, state, remaining=0) == "confident"
+
+
+def test_plain_ranking_stops_on_a_clear_leader():
+    state = build_state(dict(KILLING_FIGHT, initial_state=dict(KILLING_FIGHT["initial_state"], enemy_health=10)))
+    assert not any(is_killing_move(state, move) for move in ("rock", "paper", "scissor"))
+    assert check_early_stop(children(0.9, 0.5, 0.4), 30000, state, remaining=10) == "unreachable"
+    assert check_early_stop(children(0.9, 0.5, 0.4), 30000, state, remaining=0) == "confident"
+    assert check_early_stop(children(0.51, 0.5, 0.4), 30000, state, remaining=0) is None
+    # A move nobody has tried yet keeps the search going
+    assert check_early_stop(children(0.9, 0.5, 0.4)[:2], 20000, state, remaining=10) is None
+
+
+def test_early_stopped_search_matches_full_search():
+    state = build_state(KILLING_FIGHT)
+    stopped = search_state(state, 20000, early_stop=True, seed=1)
+    full = search_state(state, 20000, seed=1)
+    assert stopped.stop_reason in ("unreachable", "confident") and stopped.iterations < 20000
+    assert stopped.move == full.move == "rock" and stopped.selection == "killing"
+
+
+if __name__ == "__main__":
+    test_killing_override_must_be_settled()
+    test_plain_ranking_stops_on_a_clear_leader()
+    test_early_stopped_search_matches_full_search()
+    print("ok")
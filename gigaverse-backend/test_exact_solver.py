@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Exact solver check: solve_exact() must agree with a naive expectimax over
+apply_round() on small fights near the round limit.
+
+    python -m pytest -q test_exact_solver.py
+"""
+
+import random
+
+import pytest
+
+from exact_solver import ExactTableOverflow, solve_exact
+from mcts_api_v2 import MAX_ROUNDS, MOVES, GameState, apply_round
+
+
+def naive_value(state):
+    """Win probability with optimal player play against a uniformly random legal enemy."""
+    if state.enemy_health <= 0:
+        return 1.0 if state.player_health > 0 else 0.0
+    if state.is_terminal():
+        return 0.0
+    return max(naive_move_values(state).values(), default=0.0)
+
+
+def naive_move_values(state):
+    enemy_moves = [m for m in MOVES if state.enemy_charges[m] > 0]
+    if not enemy_moves:
+        return {}
+    return {move: sum(naive_value(apply_round(state.clone(), move, enemy_move))
+                      for enemy_move in enemy_moves) / len(enemy_moves)
+            for move in MOVES if state.player_charges[move] > 0}
+
+
+def random_small_state(rng):
+    state = GameState(
+        player_health=rng.randint(1, 8), player_shield=rng.randint(0, 3),
+        enemy_health=rng.randint(1, 8), enemy_shield=rng.randint(0, 3),
+        player_max_health=8, player_max_shield=3, enemy_max_health=8, enemy_max_shield=3,
+        round_number=MAX_ROUNDS - rng.randint(2, 5),
+        player_move_stats={m: {"damage": rng.randint(0, 4), "shield": rng.randint(0, 2)} for m in MOVES},
+        enemy_move_stats={m: {"damage": rng.randint(0, 4), "shield": rng.randint(0, 2)} for m in MOVES},
+    )
+    state.player_charges = {m: rng.randint(0, 3) for m in MOVES}
+    state.enemy_charges = {m: rng.randint(0, 3) for m in MOVES}
+    state.player_charges[rng.choice(MOVES)] = rng.randint(1, 3)
+    state.enemy_charges[rng.choice(MOVES)] = rng.randint(1, 3)
+    return state
+
+
+def test_matches_naive_expectimax():
+    rng = random.Random(3)
+    for _ in range(40):
+        state = random_small_state(rng)
+        best_move, win_rates = solve_exact(state)
+        expected = naive_move_values(state)
+        assert set(win_rates) == set(expected)
+        for move, value in expected.items():
+            assert win_rates[move] == pytest.approx(value, abs=1e-9)
+        assert win_rates[best_move] == pytest.approx(max(expected.values()), abs=1e-9)
+
+
+def test_gives_up_past_max_states():
+    state = GameState(player_health=40, player_shield=0, enemy_health=40, enemy_shield=0,
+                      player_max_health=40, player_max_shield=10, enemy_max_health=40, enemy_max_shield=10,
+                      player_move_stats={m: {"damage": 3 + i, "shield": 2} for i, m in enumerate(MOVES)},
+                      enemy_move_stats={m: {"damage": 3 + i, "shield": 2} for i, m in enumerate(MOVES)})
+    with pytest.raises(ExactTableOverflow):
+        solve_exact(state, max_states=100)
+
+
+if __name__ == "__main__":
+    test_matches_naive_expectimax()
+    test_gives_up_past_max_states()
+    print("ok")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+LootManager tests: the (option, future enemy) grid gives the same seeded
+rates however it is split, and racing never spends more rollouts than the
+fixed mode.
+
+    python -m pytest -q test_loot_manager.py
+"""
+
+import contextlib
+import io
+import random
+
+from loot_manager import LootManager, chunk_cells, evaluate_cell_chunk, evaluate_cells
+from mcts_parallel import shutdown_pool
+
+BOONS = ("UpgradeRock", "UpgradePaper", "UpgradeScissor", "AddMaxHealth", "AddMaxArmor", "Heal")
+CHARGES = {"rock": 3, "paper": 3, "scissor": 3}
+
+
+def random_scenario(rng):
+    max_health, max_shield = rng.randint(12, 30), rng.randint(3, 12)
+    state_data = {"player_health": rng.randint(max_health // 2, max_health), "player_shield": 0,
+                  "enemy_health": 0, "enemy_shield": 0, "player_max_health": max_health,
+                  "player_max_shield": max_shield, "enemy_max_health": 1, "enemy_max_shield": 1,
+                  "round_number": 1}
+    stats = {m: {"damage": rng.randint(2, 10), "shield": rng.randint(0, 6)} for m in CHARGES}
+    options = [{"boonTypeString": boon, "selectedVal1": rng.randint(1, 4), "selectedVal2": rng.randint(0, 2)}
+               for boon in rng.sample(BOONS, 3)]
+    return state_data, stats, rng.randint(1, 3), rng.randint(1, 4), options
+
+
+def choose(scenario, sim_iterations, racing, seed):
+    state_data, stats, floor, room, options = scenario
+    search_info = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        best = LootManager().select_best_loot_option(
+            [dict(option) for option in options], dict(state_data), stats, stats, dict(CHARGES), dict(CHARGES),
+            sim_iterations=sim_iterations, current_floor=floor, current_room=room, seed=seed, racing=racing,
+            search_info=search_info)
+    return best["action"], search_info
+
+
+def test_grid_rates_do_not_depend_on_the_split():
+    import numpy as np
+    state_data, stats, floor, room, options = random_scenario(random.Random(1))
+    manager = LootManager()
+    rng = np.random.default_rng(4)
+    cells = [cell for option in options
+             for cell in manager.future_enemy_cells(option, state_data, stats, floor, room, dict(CHARGES), 20, rng=rng)]
+    assert len(cells) == len(options) * len(manager.get_future_enemies(floor, room))
+
+    serial = evaluate_cell_chunk(cells)
+    assert all(0.0 <= rate <= 1.0 for rate in serial)
+    assert [rate for chunk in chunk_cells(cells, 3) for rate in evaluate_cell_chunk(chunk)] == serial
+    try:
+        assert evaluate_cells(cells, workers=2) == serial
+    finally:
+        shutdown_pool()
+
+
+def test_seeded_choice_is_reproducible():
+    scenario = random_scenario(random.Random(2))
+    for racing in (False, True):
+        assert choose(scenario, 50, racing, seed=9) == choose(scenario, 50, racing, seed=9)
+
+
+def test_racing_stays_within_the_fixed_budget():
+    rng = random.Random(3)
+    for k in range(12):
+        scenario = random_scenario(rng)
+        for sim_iterations in (1, 5, 8, 40, 100):
+            _, fixed = choose(scenario, sim_iterations, racing=False, seed=k)
+            _, raced = choose(scenario, sim_iterations, racing=True, seed=k)
+            assert raced["rollouts"] <= fixed["rollouts"], (k, sim_iterations, raced, fixed)
+
+
+def test_single_option_is_not_raced():
+    state_data, stats, floor, room, _ = random_scenario(random.Random(4))
+    option = {"boonTypeString": "UpgradeRock", "selectedVal1": 2, "selectedVal2": 1}
+    action, search_info = choose((state_data, stats, floor, room, [option]), 50, racing=True, seed=1)
+    assert action == "loot_one"
+    assert search_info["rollouts"] == 0 and search_info["rounds"] == 0
+
+
+if __name__ == "__main__":
+    test_grid_rates_do_not_depend_on_the_split()
+    test_seeded_choice_is_reproducible()
+    test_racing_stays_within_the_fixed_budget()
+    test_single_option_is_not_raced()
+    print("ok")
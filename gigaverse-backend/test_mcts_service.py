@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+MCTS service tests: a full dispatcher answers 503, decisions are stored in and
+answered from the decision cache, and /mcts/moves reports a malformed item
+with a short error. Searches run in-process so no worker pool is started.
+
+    python -m pytest -q test_mcts_service.py
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import mcts_service
+from decision_cache import DecisionCache
+from mcts_api_v2 import search_state
+
+GAME_STATE = {
+    "player_health": 20, "player_shield": 5, "enemy_health": 22, "enemy_shield": 4,
+    "player_max_health": 20, "player_max_shield": 5, "enemy_max_health": 22, "enemy_max_shield": 4,
+    "round_number": 3,
+    "player_charges": {"rock": 3, "paper": 2, "scissor": 1},
+    "enemy_charges": {"rock": 2, "paper": 3, "scissor": 3},
+    "player_move_stats": {"rock": {"damage": 6, "shield": 0}, "paper": {"damage": 2, "shield": 3},
+                          "scissor": {"damage": 3, "shield": 1}},
+    "enemy_move_stats": {"rock": {"damage": 5, "shield": 1}, "paper": {"damage": 2, "shield": 4},
+                         "scissor": {"damage": 4, "shield": 1}},
+}
+
+
+class InlineDispatcher(mcts_service.SearchDispatcher):
+    """SearchDispatcher that keeps admission control but searches in-process."""
+    def __init__(self, workers=1, max_queued=1):
+        super().__init__(workers=workers, max_queued=max_queued)
+        self.searches = 0
+
+    async def search(self, state, iterations, deadline, workers=1, time_budget_ms=None, early_stop=False, seed=None):
+        self.reserve(workers)
+        try:
+            self.searches += 1
+            return search_state(state, iterations, time_budget_ms=time_budget_ms, early_stop=early_stop, seed=seed)
+        finally:
+            self.pending -= workers
+
+    async def search_many(self, states, iterations, deadline, seeds=None, time_budget_ms=None, early_stop=False):
+        self.reserve(len(states))
+        try:
+            self.searches += len(states)
+            return [search_state(state, iterations, time_budget_ms=time_budget_ms, early_stop=early_stop, seed=seed)
+                    for state, seed in zip(states, seeds or [None] * len(states))]
+        finally:
+            self.pending -= len(states)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(mcts_service, "dispatcher", InlineDispatcher())
+    monkeypatch.setattr(mcts_service, "decision_cache", DecisionCache(path=None))
+    return TestClient(mcts_service.app)
+
+
+def test_full_dispatcher_answers_503(client):
+    dispatcher = mcts_service.dispatcher
+    dispatcher.reserve(dispatcher.max_pending)
+    try:
+        response = client.post("/mcts/move", json={"gameState": GAME_STATE, "iterations": 200, "useCache": False})
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == str(mcts_service.RETRY_AFTER_SECONDS)
+        response = client.post("/mcts/moves", json={"gameStates": [GAME_STATE], "iterations": 200,
+                                                    "useCache": False})
+        assert response.status_code == 503
+    finally:
+        dispatcher.pending = 0
+    assert dispatcher.rejected == 2 and dispatcher.searches == 0
+    assert client.get("/health").json()["pending"] == 0
+
+
+def test_cached_decision_is_stored_and_hit(client):
+    request = {"gameState": GAME_STATE, "iterations": 300}
+    first = client.post("/mcts/move", json=request).json()
+    assert first["success"] and first["stopReason"] != "cached"
+    assert mcts_service.decision_cache.stores == 1
+
+    second = client.post("/mcts/move", json=request).json()
+    assert second["stopReason"] == "cached" and second["move"] == first["move"]
+    assert mcts_service.dispatcher.searches == 1
+
+    batch = client.post("/mcts/moves", json={"gameStates": [GAME_STATE], "iterations": 300}).json()
+    assert batch["results"][0]["stopReason"] == "cached"
+    assert mcts_service.dispatcher.searches == 1
+
+
+def test_moves_reports_short_item_errors(client):
+    bad = dict(GAME_STATE)
+    del bad["player_health"]
+    response = client.post("/mcts/moves", json={"gameStates": [GAME_STATE, bad], "iterations": 200,
+                                                "useCache": False})
+    assert response.status_code == 200
+    good, failed = response.json()["results"]
+    assert good["success"] and good["move"]
+    assert not failed["success"]
+    assert failed["error"] == "Field required" and failed["field"] == "player_health"
+
+
+if __name__ == "__main__":
+    pytest.main(["-q", __file__])
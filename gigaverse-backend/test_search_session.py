@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+SearchSession regression test: a reused tree must keep searching from the live
+round (the API always reports round 1) instead of drifting towards MAX_ROUNDS.
+
+    python -m pytest -q test_search_session.py
+"""
+
+from mcts_api_v2 import (ARENA_CAPACITY, MAX_ROUNDS, NodeArena, SearchSession, apply_round, build_state,
+                         tree_capacity)
+
+
+def make_api_data(state):
+    return {
+        "player_move_stats": state.player_move_stats,
+        "enemy_move_stats": state.enemy_move_stats,
+        "initial_state": {
+            "player_health": state.player_health,
+            "player_shield": state.player_shield,
+            "enemy_health": state.enemy_health,
+            "enemy_shield": state.enemy_shield,
+            "player_max_health": state.player_max_health,
+            "player_max_shield": state.player_max_shield,
+            "enemy_max_health": state.enemy_max_health,
+            "enemy_max_shield": state.enemy_max_shield,
+            "round_number": 1,
+        },
+        "player_charges": dict(state.player_charges),
+        "enemy_charges": dict(state.enemy_charges),
+    }
+
+
+# A fight nobody can finish within MAX_ROUNDS: the enemy deals no damage and the
+# player chips away at a huge health pool
+LONG_FIGHT = {
+    "player_move_stats": {"rock": {"damage": 1, "shield": 0}, "paper": {"damage": 1, "shield": 0},
+                          "scissor": {"damage": 1, "shield": 0}},
+    "enemy_move_stats": {"rock": {"damage": 0, "shield": 0}, "paper": {"damage": 0, "shield": 0},
+                         "scissor": {"damage": 0, "shield": 0}},
+    "initial_state": {"player_health": 20, "player_shield": 0, "enemy_health": 1000, "enemy_shield": 0,
+                      "player_max_health": 20, "player_max_shield": 0, "enemy_max_health": 1000,
+                      "enemy_max_shield": 0, "round_number": 1},
+    "player_charges": {"rock": 3, "paper": 3, "scissor": 3},
+    "enemy_charges": {"rock": 3, "paper": 3, "scissor": 3},
+}
+
+
+def test_reused_tree_keeps_live_round():
+    for tt_max_entries in (0, 10000):
+        session = SearchSession(LONG_FIGHT, tt_max_entries=tt_max_entries, seed=7)
+        live = build_state(LONG_FIGHT)
+        reused = 0
+        for _ in range(MAX_ROUNDS + 5):
+            result = session.search(2000)
+            # A terminal root would return the blind fallback move without any visits
+            assert result.moves and sum(m.visits for m in result.moves) > 0
+            assert session.root_state.round_number == 1
+
+            enemy_move = max(live.enemy_charges, key=live.enemy_charges.get)
+            live = apply_round(live, result.move, enemy_move)
+            live.round_number = 1
+            reused += session.advance(result.move, enemy_move, make_api_data(live))
+        assert reused > MAX_ROUNDS
+
+
+def test_arena_grows_with_the_search():
+    session = SearchSession(LONG_FIGHT, seed=7)
+    result = session.search(500)
+    assert session.arena.capacity <= tree_capacity(500) + 1 < ARENA_CAPACITY
+    assert len(session.arena) <= session.arena.capacity
+
+    enemy_move = max(LONG_FIGHT["enemy_charges"], key=LONG_FIGHT["enemy_charges"].get)
+    live = apply_round(build_state(LONG_FIGHT), result.move, enemy_move)
+    live.round_number = 1
+    assert session.advance(result.move, enemy_move, make_api_data(live))
+    # The copied subtree only takes what it needs, and the next search tops it up
+    assert session.arena.capacity < tree_capacity(500)
+    session.search(1000)
+    assert session.arena.node_visits(session.arena.root) >= 1000
+
+
+def test_arena_stops_at_max_capacity():
+    arena = NodeArena(4, max_capacity=10)
+    assert arena._allocate(6) == 1 and arena.capacity == 8
+    assert arena._allocate(3) == 7 and arena.capacity == 10
+    assert arena._allocate(1) == -1
+    assert len(arena.visits) == arena.capacity == 10
+
+
+if __name__ == "__main__":
+    test_reused_tree_keeps_live_round()
+    test_arena_grows_with_the_search()
+    test_arena_stops_at_max_capacity()
+    print("ok")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+TranspositionTable tests: entries are shared per (state, move), evicted least
+recently used, follow a subtree copy, and let tree nodes share counters.
+
+    python -m pytest -q test_transposition_table.py
+"""
+
+from mcts_api_v2 import (NodeArena, TranspositionTable, apply_round, build_state, make_rng, mcts_search,
+                         run_iterations)
+from test_search_session import LONG_FIGHT
+
+
+def test_lookup_shares_and_evicts():
+    table = TranspositionTable(max_entries=2)
+    state = build_state(LONG_FIGHT)
+    other = apply_round(state.clone(), "rock", "paper")
+
+    assert table.lookup(state, "rock", 5) == 5
+    assert table.lookup(state, "rock", 9) == 5  # same state and move: the first owner's counters
+    assert table.lookup(state, "paper", 7) == 7
+    assert (table.hits, table.misses) == (1, 2)
+
+    # (state, rock) was used last, so (state, paper) is the one evicted
+    table.lookup(state, "rock", 11)
+    assert table.lookup(other, "rock", 3) == 3
+    assert len(table) == 2
+    assert table.lookup(state, "paper", 8) == 8
+
+
+def test_remap_and_shift_rounds():
+    table = TranspositionTable()
+    state = build_state(LONG_FIGHT)
+    table.lookup(state, "rock", 4)
+    table.lookup(state, "paper", 6)
+
+    table.remap({4: 1})  # the paper node was not copied
+    assert len(table) == 1 and table.lookup(state, "rock", 99) == 1
+
+    table.shift_rounds(2)
+    state.round_number += 2
+    assert table.lookup(state, "rock", 99) == 1
+
+
+def test_search_shares_counters_between_transpositions():
+    state = build_state(LONG_FIGHT)
+    table = TranspositionTable(10000)
+    arena = NodeArena(20000)
+    completed, _ = run_iterations(arena, state, 3000, transposition_table=table, verbose=False, rng=make_rng(5))
+    assert completed == 3000 and table.hits > 0
+    # Nodes reached by different move orders point at one owner's counters
+    assert any(arena.stat[i] != i for i in range(len(arena)))
+
+    result = mcts_search(state, 3000, transposition_table=TranspositionTable(10000), seed=5)
+    assert result.iterations == 3000 and result.move in ("rock", "paper", "scissor")
+
+
+if __name__ == "__main__":
+    test_lookup_shares_and_evicts()
+    test_remap_and_shift_rounds()
+    test_search_shares_counters_between_transpositions()
+    print("ok")
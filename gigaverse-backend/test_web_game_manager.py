@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+WebGameManager smoke test: drive one loot phase against a fake API and check
+that a loot option is chosen and sent (the web dashboard uses the giga_cli_bot
+managers, so this catches calls they do not support).
+
+    python -m pytest -q test_web_game_manager.py
+"""
+
+from giga_cli_bot.loot_manager import LootManager
+from giga_cli_bot.state_manager import StateManager
+from giga_cli_bot.ui_manager import UiManager
+from web_game_manager import WebGameManager
+
+
+def make_fighter(health, shield, atk):
+    fighter = {
+        "health": {"current": health, "starting": health, "startingMax": health},
+        "shield": {"current": shield, "starting": shield, "startingMax": shield},
+    }
+    for move in ("rock", "paper", "scissor"):
+        fighter[move] = {"currentATK": atk, "currentDEF": 1, "currentCharges": 3}
+    return fighter
+
+
+LOOT_RUN = {
+    "lootPhase": True,
+    "lootOptions": [
+        {"boonTypeString": "UpgradeRock", "selectedVal1": 2, "selectedVal2": 0, "action": "loot_one"},
+        {"boonTypeString": "AddMaxHealth", "selectedVal1": 3, "selectedVal2": 0, "action": "loot_two"},
+    ],
+    "players": [make_fighter(20, 5, 4), make_fighter(0, 0, 2)],
+}
+
+
+class FakeApiManager:
+    DEFAULT_ACTION_DATA = {}
+
+    def __init__(self):
+        self.actions = []
+
+    def send_action(self, action, action_token, dungeon_id, data):
+        self.actions.append(action)
+        # Fail the loot action so the run ends right after the loot phase
+        return None
+
+
+class FakeEmitter:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, kind, category, message, data=None):
+        self.events.append((category, message))
+
+
+def test_loot_phase_chooses_an_option():
+    api_manager = FakeApiManager()
+    emitter = FakeEmitter()
+    manager = WebGameManager(api_manager, StateManager(), LootManager(), UiManager(), emitter)
+    manager.settings['sim_iterations'] = 5
+
+    manager.play_game("underhaul", action_token="token", initial_run=LOOT_RUN)
+
+    assert api_manager.actions and api_manager.actions[0] in ("loot_one", "loot_two")
+    assert any(message.startswith("✅ Selected loot") for _, message in emitter.events)
+
+
+if __name__ == "__main__":
+    test_loot_phase_chooses_an_option()
+    print("ok")